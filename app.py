@@ -1,20 +1,217 @@
-from flask import Flask
+import atexit
+import logging
+import time
+from typing import Dict, List, Optional
+from flask import Flask, current_app, g, request
 from flask_restful import Api
-from resources.anime import AnimeResource, AnimeListResource
-from resources.episode import EpisodeListResource, EpisodeResource
+from core import config
+from resources.anime import AnimeInfoResource, AnimeResource, AnimeListResource, CategoryListResource
+from resources.episode import EpisodeListResource, EpisodeResource, EpisodeStreamResource
+from resources.batch import BatchAnimesResource, BatchEpisodesResource
+from resources.warmer import WarmerStatusResource
+from resources.metrics import MetricsResource
+from utils.scraper import JKAnimeScraper
+from utils.event_loop import BackgroundLoop
+from utils.metrics import HTTP_IN_FLIGHT, HTTP_LATENCY, Sample, registry
+from utils.singleflight import flights
+from utils.http_cache import make_conditional
+from utils.serialization import output_json, set_backend
+from services.catalog import CatalogIndex
+from services.warmer import ScheduleWarmer
 
+logger = logging.getLogger(__name__)
 
-def create_app():
+
+def init_scraper(app: Flask) -> JKAnimeScraper:
+    """
+    Create the shared scraper with the app's HTTP pool settings and close
+    its pooled session when the process exits.
+    """
+    scraper = JKAnimeScraper(
+        pool_size=app.config['HTTP_POOL_SIZE'],
+        limit_per_host=app.config['HTTP_LIMIT_PER_HOST'],
+        dns_cache_ttl=app.config['HTTP_DNS_CACHE_TTL'],
+        keepalive_timeout=app.config['HTTP_KEEPALIVE_TIMEOUT'],
+        timeout=app.config['HTTP_TIMEOUT'],
+        fetch_threads=app.config['FETCH_THREADS'],
+        max_in_flight=app.config['UPSTREAM_MAX_IN_FLIGHT'],
+        rate_limit=app.config['UPSTREAM_RATE_LIMIT'],
+        burst=app.config['UPSTREAM_BURST'],
+        player_rate_limit=app.config['UPSTREAM_PLAYER_RATE_LIMIT'],
+        player_burst=app.config['UPSTREAM_PLAYER_BURST'],
+    )
+    app.extensions['jkanime_scraper'] = scraper
+    atexit.register(scraper.close)
+    # Renew the shared Cloudflare clearance before it expires
+    scraper.start_clearance_refresher(BackgroundLoop().loop)
+    return scraper
+
+
+def init_event_loop(app: Flask) -> BackgroundLoop:
+    """
+    Start the long-lived loop the async scraper runs on. It is stopped at
+    exit after the scraper, whose session close needs the loop running.
+    """
+    background_loop = BackgroundLoop()
+    background_loop.start()
+    app.extensions['jkanime_loop'] = background_loop
+    atexit.register(background_loop.stop)
+    return background_loop
+
+
+def init_catalog(app: Flask) -> CatalogIndex:
+    """
+    Load the catalog index and keep it fresh when CATALOG_REFRESH_INTERVAL is set.
+    """
+    catalog = CatalogIndex(app.config['CATALOG_PATH'])
+    catalog.start_refresher(app.config['CATALOG_REFRESH_INTERVAL'])
+    app.extensions['jkanime_catalog'] = catalog
+    atexit.register(catalog.stop)
+    return catalog
+
+
+def init_warmer(app: Flask) -> ScheduleWarmer:
+    """
+    Pre-resolve today's airing episodes on the shared loop when WARMER_INTERVAL is set.
+    """
+    warmer = ScheduleWarmer(
+        interval=app.config['WARMER_INTERVAL'],
+        concurrency=app.config['WARMER_CONCURRENCY'],
+        rate_limit=app.config['WARMER_RATE_LIMIT'],
+    )
+    warmer.start()
+    app.extensions['jkanime_warmer'] = warmer
+    atexit.register(warmer.stop)
+    return warmer
+
+
+def init_metrics(app: Flask, scraper: JKAnimeScraper) -> None:
+    """
+    Time every API request and export the cache and coalescing counters
+    the scraper already keeps.
+    """
+    registry.enabled = app.config['METRICS_ENABLED']
+    if not registry.enabled:
+        return
+
+    @app.before_request
+    def start_timer() -> None:
+        g.metrics_started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+
+    @app.after_request
+    def observe_latency(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            HTTP_LATENCY.observe(
+                time.perf_counter() - started,
+                endpoint=endpoint, method=request.method, status=response.status_code,
+            )
+        return response
+
+    @app.teardown_request
+    def end_request(error=None) -> None:
+        HTTP_IN_FLIGHT.dec()
+
+    def cache_events() -> List[Sample]:
+        return [
+            ('jkanime_cache_events_total', {'cache': name, 'tier': tier, 'event': event}, value)
+            for name, cache in (('scrape', scraper._cache), ('validators', scraper._validators))
+            for tier, stats in cache.stats().items()
+            for event, value in stats.items()
+        ]
+
+    def coalescing() -> List[Sample]:
+        return [
+            ('jkanime_singleflight_total', {'operation': operation, 'event': event}, value)
+            for operation, stats in flights.stats().items()
+            for event, value in stats.items()
+        ]
+
+    registry.collector(
+        'jkanime_cache_events_total', 'Scrape and validator cache hits, misses and evictions per tier', 'counter', cache_events,
+    )
+    registry.collector(
+        'jkanime_singleflight_total', 'Single-flight calls, executions and coalesced waits per operation',
+        'counter', coalescing,
+    )
+
+
+def init_startup_log(app: Flask, scraper: JKAnimeScraper, started: float) -> None:
+    """
+    Log how long after startup the first request was served, and whether
+    the Cloudflare clearance came from the shared store.
+    """
+    served = []
+
+    @app.after_request
+    def log_first_request(response):
+        if not served:
+            served.append(True)
+            logger.info(
+                "First request served %.0fms after startup (clearance: %s)",
+                (time.perf_counter() - started) * 1000, scraper.clearance_source or 'none',
+            )
+        return response
+
+
+def init_http_cache(app: Flask) -> None:
+    """
+    Strong ETags, 304s and the resource's Cache-Control on successful GETs.
+    """
+    @app.after_request
+    def conditional(response):
+        view = current_app.view_functions.get(request.endpoint) if request.endpoint else None
+        control = getattr(getattr(view, 'view_class', None), 'cache_control', None)
+        return make_conditional(response, request, control)
+
+
+def create_app(settings: Optional[Dict] = None):
+    started = time.perf_counter()
     app = Flask(__name__)
+    app.config.from_object(config)
+    if settings:
+        app.config.update(settings)
     api = Api(app)
+    # Models are written by the fast serializer without intermediate dicts
+    set_backend(app.config['JSON_BACKEND'])
+    api.representations['application/json'] = output_json
+    logging.basicConfig(level=app.config['LOG_LEVEL'])
+
+    init_event_loop(app)
+    scraper = init_scraper(app)
+    init_metrics(app, scraper)
+    init_startup_log(app, scraper, started)
+    init_http_cache(app)
+    init_catalog(app)
+    init_warmer(app)
     
     # Register routes
     # Gell all titles from directory
     api.add_resource(AnimeListResource, '/animes')
     api.add_resource(AnimeResource, '/animes/<string:query>/<int:page>')
+    # Genre, type and letter listings, paged with the returned next_cursor.
+    # Kept out of /animes/ where they would shadow /animes/<query>/<int:page>
+    for kind in ('genre', 'type', 'letter'):
+        api.add_resource(
+            CategoryListResource, f'/{kind}s/<string:value>',
+            endpoint=f'{kind}_listing', resource_class_kwargs={'kind': kind},
+        )
+    # Cached metadata of an anime page (title fields, episode ranges)
+    api.add_resource(AnimeInfoResource, '/animes/<string:anime_id>/info')
     # Get all episodes from anime_id route
     api.add_resource(EpisodeListResource, '/animes/<string:anime_id>/episodes')
+    # Stream episodes as they resolve (NDJSON or SSE)
+    api.add_resource(EpisodeStreamResource, '/animes/<string:anime_id>/episodes/stream')
     api.add_resource(EpisodeResource, '/animes/<string:anime_id>/episodes/<int:number>')
+    # Resolve many episodes or anime in one request
+    api.add_resource(BatchEpisodesResource, '/batch/episodes')
+    api.add_resource(BatchAnimesResource, '/batch/animes')
+    # What the schedule warmer resolved and when
+    api.add_resource(WarmerStatusResource, '/warmer/status')
+    # Prometheus scrape target
+    api.add_resource(MetricsResource, '/metrics')
 
 
     return app
@@ -0,0 +1,72 @@
+"""
+Check that every fast-path extractor in utils.extract returns exactly what
+the full BeautifulSoup parse returns on the saved fixture pages.
+
+    python -m benchmarks.parity
+"""
+
+import os
+import sys
+from typing import List, Optional
+from utils.extract import EXTRACTORS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Extractors run against each fixture, the rest must agree on "nothing found"
+EXPECTED = {
+    'directorio_1.html': ['animes'],
+    'buscar_naruto_1.html': ['anime_items'],
+    'anime_one-piece.html': ['pagination', 'details'],
+    'episode_one-piece_1.html': ['servers'],
+    'jkplayer_desu.html': ['player'],
+    'horario.html': ['schedule'],
+}
+
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def fixtures() -> List[str]:
+    return sorted(name for name in os.listdir(FIXTURES_DIR) if name.endswith(".html"))
+
+
+def check_extractor(fixture: str, name: str, html: Optional[str] = None) -> Optional[str]:
+    """
+    Describe how extractor ``name`` fails on ``fixture``, None when it passes.
+    """
+    html = load_fixture(fixture) if html is None else html
+    fast, full = EXTRACTORS[name]
+    fast_result, full_result = fast(html), full(html)
+    if fast_result != full_result:
+        return f"{fixture}: {name} fast path differs from full parse"
+    if name in EXPECTED.get(fixture, []) and not full_result:
+        return f"{fixture}: {name} found nothing"
+    return None
+
+
+def check_parity() -> List[str]:
+    """
+    Return a description of every mismatch, empty when all extractors agree.
+    """
+    failures = []
+    for fixture in fixtures():
+        html = load_fixture(fixture)
+        for name in EXTRACTORS:
+            failure = check_extractor(fixture, name, html)
+            if failure:
+                failures.append(failure)
+    return failures
+
+
+def main() -> int:
+    failures = check_parity()
+    for failure in failures:
+        print(failure)
+    print(f"parity: {'FAIL' if failures else 'OK'} ({len(failures)} mismatches)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Local stand-in for jkanime.net that replays the saved fixture pages.
+
+    python -m benchmarks.replay_server --port 8800 --latency 0.05 --jitter 0.02
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import zlib
+from typing import Dict, Optional
+from aiohttp import web
+from benchmarks.parity import load_fixture
+
+EMPTY_DIRECTORY = "<html><body><script>\nvar animes = [];\nvar mode = \"directorio\";\n</script></body></html>"
+
+
+class ReplayServer:
+    """
+    Serve the fixtures for the jkanime routes the scraper uses, adding
+    ``latency`` seconds plus up to ``jitter`` seconds to every response.
+    Directory and listing pages past ``directory_pages`` are empty, listing
+    pages (genre, type, letter) replay the search fixture. Fixture pages carry
+    an ETag and answer a matching If-None-Match with 304. ``failures`` maps a
+    path (or path with query) to how many of its next requests get a 503.
+    """
+
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            port: int = 0,
+            latency: float = 0.0,
+            jitter: float = 0.0,
+            directory_pages: int = 5,
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.directory_pages = directory_pages
+        self.requests = 0
+        self.not_modified = 0
+        self.failures: Dict[str, int] = {}
+        self._pages = {
+            'directory': load_fixture('directorio_1.html'),
+            'search': load_fixture('buscar_naruto_1.html'),
+            'anime': load_fixture('anime_one-piece.html'),
+            'episode': load_fixture('episode_one-piece_1.html'),
+            'player': load_fixture('jkplayer_desu.html'),
+            'schedule': load_fixture('horario.html'),
+        }
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/"
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._fail])
+        app.router.add_get('/directorio/{page:\\d+}', self.directory)
+        app.router.add_get('/buscar/{query}/{page}', self.page('search'))
+        app.router.add_get('/jkplayer/{player}', self.page('player'))
+        app.router.add_get('/horario/', self.page('schedule'))
+        for listing in ('genero', 'tipo', 'letra'):
+            app.router.add_get(f'/{listing}/{{value}}/{{page:\\d+}}', self.listing)
+            app.router.add_get(f'/{listing}/{{value}}/{{page:\\d+}}/', self.listing)
+        app.router.add_get('/{anime_id}/{episode:\\d+}', self.page('episode'))
+        app.router.add_get('/{anime_id}/{episode:\\d+}/', self.page('episode'))
+        app.router.add_get('/{anime_id}', self.page('anime'))
+        app.router.add_get('/{anime_id}/', self.page('anime'))
+        return app
+
+    @web.middleware
+    async def _fail(self, request: web.Request, handler):
+        path = request.path_qs if request.path_qs in self.failures else request.path
+        if self.failures.get(path, 0) > 0:
+            self.failures[path] -= 1
+            self.requests += 1
+            return web.Response(status=503, text="Service Unavailable")
+        return await handler(request)
+
+    async def _delay(self) -> None:
+        self.requests += 1
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def page(self, name: str):
+        etag = f'"{zlib.crc32(self._pages[name].encode()):08x}"'
+
+        async def handler(request: web.Request) -> web.Response:
+            await self._delay()
+            if request.headers.get('If-None-Match') == etag:
+                self.not_modified += 1
+                return web.Response(status=304, headers={'ETag': etag})
+            return web.Response(text=self._pages[name], content_type='text/html', headers={'ETag': etag})
+        return handler
+
+    async def directory(self, request: web.Request) -> web.Response:
+        await self._delay()
+        page = int(request.match_info['page'])
+        body = self._pages['directory'] if page <= self.directory_pages else EMPTY_DIRECTORY
+        return web.Response(text=body, content_type='text/html')
+
+    async def listing(self, request: web.Request) -> web.Response:
+        await self._delay()
+        page = int(request.match_info['page'])
+        body = self._pages['search'] if page <= self.directory_pages else EMPTY_DIRECTORY
+        return web.Response(text=body, content_type='text/html')
+
+    def start(self) -> "ReplayServer":
+        """
+        Start serving in a background thread, returns once the port is bound.
+        """
+        started = threading.Event()
+
+        def run() -> None:
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._runner = web.AppRunner(self.app(), access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, self.host, self.port)
+            self._loop.run_until_complete(site.start())
+            self.port = site._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="replay-server", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop)
+        future.result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay jkanime fixtures locally")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="max random extra seconds")
+    parser.add_argument('--directory-pages', type=int, default=5)
+    args = parser.parse_args()
+
+    server = ReplayServer(args.host, args.port, args.latency, args.jitter, args.directory_pages)
+    web.run_app(server.app(), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
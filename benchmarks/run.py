@@ -0,0 +1,209 @@
+"""
+Offline benchmark of the API against the local replay server.
+
+    python -m benchmarks.run --concurrency 1 8 32 --requests 200 --latency 0.05 --output bench.json
+
+The Flask app from ``create_app()`` is served on a local port with the
+scraper pointed at the replay server, every endpoint is driven at each
+concurrency level, and the parse-only cost of every extractor is measured.
+Results are written as JSON so runs can be compared for regressions.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+from benchmarks.parity import load_fixture
+from benchmarks.replay_server import ReplayServer
+
+ENDPOINTS = {
+    'directory': '/animes?page={i}',
+    'search': '/animes/naruto/{i}',
+    'genre': '/genres/accion',
+    'info': '/animes/one-piece/info',
+    'episodes': '/animes/one-piece/episodes?page=1',
+    'episode': '/animes/one-piece/episodes/{i}',
+}
+
+PARSE_FIXTURES = {
+    'servers': 'episode_one-piece_1.html',
+    'player': 'jkplayer_desu.html',
+    'animes': 'directorio_1.html',
+    'anime_items': 'buscar_naruto_1.html',
+    'pagination': 'anime_one-piece.html',
+    'details': 'anime_one-piece.html',
+    'schedule': 'horario.html',
+}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float], elapsed: float, errors: int) -> Dict:
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+def drive(base_url: str, path: str, requests: int, concurrency: int) -> Dict:
+    """
+    Send ``requests`` GETs with ``concurrency`` workers and time each one.
+    ``{i}`` in the path is replaced with a per-request number spread over a
+    small range, so both cold and warm cache entries are exercised.
+    """
+    samples: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i: int) -> None:
+        nonlocal errors
+        url = base_url + path.format(i=i % 12 + 1)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=60) as response:
+                response.read()
+            ok = True
+        except (urllib.error.URLError, OSError):
+            ok = False
+        took = time.perf_counter() - start
+        with lock:
+            if ok:
+                samples.append(took)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    return summarize(samples, time.perf_counter() - start, errors)
+
+
+def time_call(fn: Callable[[], object], repeat: int) -> Dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+    }
+
+
+def bench_parsing(repeat: int) -> Dict:
+    """
+    Parse-only cost of every extractor, fast path and full parse.
+    """
+    from utils.extract import EXTRACTORS
+
+    results = {}
+    for name, (fast, full) in EXTRACTORS.items():
+        html = load_fixture(PARSE_FIXTURES[name])
+        results[name] = {
+            'fast': time_call(lambda: fast(html), repeat),
+            'full': time_call(lambda: full(html), repeat),
+        }
+    return results
+
+
+def serve_app(port: int = 0):
+    """
+    Serve ``create_app()`` with werkzeug in a background thread.
+    """
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import create_app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs) -> None:
+            pass
+
+    server = make_server("127.0.0.1", port, create_app(), threaded=True, request_handler=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, name="bench-app", daemon=True)
+    thread.start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline API benchmark")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=100, help="requests per endpoint and level")
+    parser.add_argument('--endpoints', nargs='+', default=list(ENDPOINTS), choices=list(ENDPOINTS))
+    parser.add_argument('--latency', type=float, default=0.02, help="replay server latency (s)")
+    parser.add_argument('--jitter', type=float, default=0.01, help="replay server jitter (s)")
+    parser.add_argument('--cache', action='store_true', help="keep the scrape cache enabled")
+    parser.add_argument('--parse-repeat', type=int, default=50)
+    parser.add_argument('--output', default="bench_output.json")
+    args = parser.parse_args()
+
+    # Every {i} in ENDPOINTS maps to a page the replay server has
+    replay = ReplayServer(latency=args.latency, jitter=args.jitter, directory_pages=12).start()
+
+    # Must be set before the app modules import core.constants / core.config
+    os.environ["JKANIME_BASE_URL"] = replay.base_url
+    os.environ["JKANIME_CACHE_PATH"] = ""
+    os.environ.setdefault("JKANIME_UPSTREAM_RATE_LIMIT", "0")
+    os.environ.setdefault("JKANIME_UPSTREAM_PLAYER_RATE_LIMIT", "0")
+    os.environ.setdefault("JKANIME_LOG_LEVEL", "WARNING")
+    if not args.cache:
+        for endpoint in ('DIRECTORY', 'SEARCH', 'EPISODES', 'SERVERS', 'IFRAME', 'ANIME', 'SCHEDULE', 'LISTING'):
+            os.environ[f"JKANIME_CACHE_TTL_{endpoint}"] = "0"
+        os.environ["JKANIME_CACHE_STALE_TTL"] = "0"
+        os.environ["JKANIME_CACHE_NEGATIVE_TTL"] = "0"
+
+    server = serve_app()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'settings': {
+            'latency': args.latency,
+            'jitter': args.jitter,
+            'requests': args.requests,
+            'cache': args.cache,
+        },
+        'endpoints': {},
+        'parsing': bench_parsing(args.parse_repeat),
+    }
+    try:
+        for name in args.endpoints:
+            report['endpoints'][name] = {}
+            for concurrency in args.concurrency:
+                result = drive(base_url, ENDPOINTS[name], args.requests, concurrency)
+                report['endpoints'][name][str(concurrency)] = result
+                print(
+                    f"{name:<10} c={concurrency:<4} {result['throughput_rps']:>8} req/s  "
+                    f"p50 {result['p50_ms']:>9}ms  p95 {result['p95_ms']:>9}ms  "
+                    f"p99 {result['p99_ms']:>9}ms  errors {result['errors']}"
+                )
+    finally:
+        server.shutdown()
+        replay.stop()
+
+    report['upstream_requests'] = replay.requests
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark of building and encoding a large listing response.
+
+    python -m benchmarks.serialization --titles 1000 --repeat 200
+
+"before" is the previous path: a dataclass per title turned into a fresh
+dict with ``.data`` and encoded by Flask-RESTful's stdlib ``json.dumps``.
+The other rows encode the slotted records directly with each backend.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Callable, Dict, List
+from flask import Flask
+from benchmarks.parity import load_fixture
+from models.anime import Anime
+from utils.extract import extract_animes
+from utils.serialization import BACKENDS
+
+
+def sample_titles(count: int) -> List[Dict]:
+    """
+    ``count`` directory records, repeating the fixture page.
+    """
+    page = extract_animes(load_fixture('directorio_1.html'))
+    return [dict(page[i % len(page)], id=f"{page[i % len(page)]['id']}-{i}") for i in range(count)]
+
+
+def time_call(fn: Callable[[], object], repeat: int) -> Dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+        'min_ms': round(min(samples) * 1000, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Response serialization micro-benchmark")
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    records = sample_titles(args.titles)
+
+    def models() -> List[Anime]:
+        return [
+            Anime(
+                id=r.get('id'), title=r.get('title'), image=r.get('image'),
+                synopsis=r.get('synopsis'), type=r.get('type'),
+            )
+            for r in records
+        ]
+
+    def before() -> bytes:
+        body = {'data': [anime.data for anime in models()], 'pagination': {'current_page': 1}}
+        return (json.dumps(body) + "\n").encode('utf-8')
+
+    results = {'before': time_call(before, args.repeat)}
+    with Flask(__name__).app_context():
+        for name, encode in BACKENDS.items():
+            results[name] = time_call(
+                lambda: encode({'data': models(), 'pagination': {'current_page': 1}}) + b"\n", args.repeat,
+            )
+
+    baseline = results['before']['mean_ms']
+    for name, result in results.items():
+        print(f"{name:<8} mean {result['mean_ms']:>8}ms  min {result['min_ms']:>8}ms  x{baseline / result['mean_ms']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Runtime tunables. Every value can be overridden with an environment variable
+of the same name prefixed with ``JKANIME_``.
+"""
+
+import os
+import tempfile
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(f"JKANIME_{name}")
+    return int(value) if value else default
+
+
+def _env_str(name: str, default: str) -> str:
+    return os.environ.get(f"JKANIME_{name}", default)
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(f"JKANIME_{name}")
+    return float(value) if value else default
+
+
+# Pooled aiohttp session used for iframe resolution
+HTTP_POOL_SIZE = _env_int("HTTP_POOL_SIZE", 100)
+HTTP_LIMIT_PER_HOST = _env_int("HTTP_LIMIT_PER_HOST", 16)
+HTTP_DNS_CACHE_TTL = _env_int("HTTP_DNS_CACHE_TTL", 300)
+HTTP_KEEPALIVE_TIMEOUT = _env_float("HTTP_KEEPALIVE_TIMEOUT", 30.0)
+HTTP_TIMEOUT = _env_float("HTTP_TIMEOUT", 15.0)
+
+# Thread pool used when an upstream fetch has to go through cloudscraper
+FETCH_THREADS = _env_int("FETCH_THREADS", 8)
+
+# Politeness towards jkanime: concurrent upstream work and requests/sec per host
+UPSTREAM_MAX_IN_FLIGHT = _env_int("UPSTREAM_MAX_IN_FLIGHT", 6)
+UPSTREAM_RATE_LIMIT = _env_float("UPSTREAM_RATE_LIMIT", 10.0)
+UPSTREAM_BURST = _env_int("UPSTREAM_BURST", 10)
+# Player (iframe) pages have a bucket of their own: an episode page lists ~8 of
+# them, so sharing the page bucket held a cold 12-episode page (~108 fetches) to
+# ~10s. The burst covers the iframes of UPSTREAM_MAX_IN_FLIGHT episodes, bringing
+# that page to ~1.5s, at the cost of up to 50 req/s per host at peak instead of 10.
+UPSTREAM_PLAYER_RATE_LIMIT = _env_float("UPSTREAM_PLAYER_RATE_LIMIT", 40.0)
+UPSTREAM_PLAYER_BURST = _env_int("UPSTREAM_PLAYER_BURST", 48)
+
+# Scrape cache: in-process LRU plus a SQLite file shared by the workers of a node.
+# Set JKANIME_CACHE_PATH to an empty string to keep the cache in memory only.
+CACHE_PATH = _env_str("CACHE_PATH", os.path.join(tempfile.gettempdir(), "jkanime-cache.sqlite3"))
+CACHE_MAX_ENTRIES = _env_int("CACHE_MAX_ENTRIES", 2048)
+CACHE_MAX_BYTES = _env_int("CACHE_MAX_BYTES", 64 * 1024 * 1024)
+# How often a worker applies the invalidations of the others to its memory tier, in seconds
+CACHE_INVALIDATION_INTERVAL = _env_float("CACHE_INVALIDATION_INTERVAL", 1.0)
+# Time to live in seconds per cached endpoint
+CACHE_TTLS = {
+    'directory': _env_int("CACHE_TTL_DIRECTORY", 6 * 3600),
+    'search': _env_int("CACHE_TTL_SEARCH", 3600),
+    'episodes': _env_int("CACHE_TTL_EPISODES", 1800),
+    'servers': _env_int("CACHE_TTL_SERVERS", 3600),
+    'iframe': _env_int("CACHE_TTL_IFRAME", 3600),
+    'anime': _env_int("CACHE_TTL_ANIME", 6 * 3600),
+    'schedule': _env_int("CACHE_TTL_SCHEDULE", 600),
+    'listing': _env_int("CACHE_TTL_LISTING", 3600),
+}
+# Failed scrapes are remembered briefly so they are retried soon
+CACHE_NEGATIVE_TTL = _env_int("CACHE_NEGATIVE_TTL", 30)
+# Expired entries are still served for this long while a refresh runs in the background
+CACHE_STALE_TTL = _env_int("CACHE_STALE_TTL", 24 * 3600)
+
+# Local catalog index built from the directory pages
+CATALOG_PATH = _env_str("CATALOG_PATH", os.path.join(tempfile.gettempdir(), "jkanime-catalog.sqlite3"))
+CATALOG_SEARCH_PAGE_SIZE = _env_int("CATALOG_SEARCH_PAGE_SIZE", 12)
+# How often a worker checks the index file for a newer generation
+CATALOG_RELOAD_INTERVAL = _env_float("CATALOG_RELOAD_INTERVAL", 30.0)
+# Incremental refresh re-crawls this many directory pages, every interval seconds (0 disables it)
+CATALOG_REFRESH_PAGES = _env_int("CATALOG_REFRESH_PAGES", 3)
+CATALOG_REFRESH_INTERVAL = _env_float("CATALOG_REFRESH_INTERVAL", 0)
+
+# Default latency budget in seconds for resolving an episode's servers (0 waits for all)
+SERVERS_BUDGET = _env_float("SERVERS_BUDGET", 5.0)
+
+# Most episodes a whole-series stream (?all=true) resolves, each one takes several upstream requests
+STREAM_MAX_EPISODES = _env_int("STREAM_MAX_EPISODES", 60)
+
+# Mirror health: consecutive failures before a mirror is skipped, and for how long
+MIRROR_FAILURE_THRESHOLD = _env_int("MIRROR_FAILURE_THRESHOLD", 3)
+MIRROR_COOLDOWN = _env_float("MIRROR_COOLDOWN", 60.0)
+# A duplicate iframe request is sent once the first is slower than the mirror's tail latency
+HEDGE_MIN_DELAY = _env_float("HEDGE_MIN_DELAY", 0.3)
+HEDGE_MAX_DELAY = _env_float("HEDGE_MAX_DELAY", 2.0)
+
+# Batch endpoints: most items per request and how many resolve at once
+BATCH_MAX_ITEMS = _env_int("BATCH_MAX_ITEMS", 50)
+BATCH_CONCURRENCY = _env_int("BATCH_CONCURRENCY", 8)
+
+# Schedule warmer: pre-resolves today's airing episodes every interval seconds (0 disables it),
+# resolving this many at once and starting at most WARMER_RATE_LIMIT per second
+WARMER_INTERVAL = _env_float("WARMER_INTERVAL", 0)
+WARMER_CONCURRENCY = _env_int("WARMER_CONCURRENCY", 2)
+WARMER_RATE_LIMIT = _env_float("WARMER_RATE_LIMIT", 1.0)
+
+# Prometheus-style metrics on /metrics (0 turns every update into a no-op)
+METRICS_ENABLED = _env_int("METRICS_ENABLED", 1) != 0
+LOG_LEVEL = _env_str("LOG_LEVEL", "INFO")
+
+# Cloudflare clearance cookies shared by the workers of a node ("" keeps them per process),
+# renewed this many seconds before they expire, or checked every interval when they do not expire
+CLEARANCE_PATH = _env_str("CLEARANCE_PATH", os.path.join(tempfile.gettempdir(), "jkanime-clearance.json"))
+CLEARANCE_REFRESH_MARGIN = _env_float("CLEARANCE_REFRESH_MARGIN", 300.0)
+CLEARANCE_CHECK_INTERVAL = _env_float("CLEARANCE_CHECK_INTERVAL", 600.0)
+
+# Upstream ETag/Last-Modified and the parse result they validate are kept this long,
+# in a cache of their own so they do not take room from the scrape cache
+CACHE_VALIDATOR_TTL = _env_int("CACHE_VALIDATOR_TTL", 7 * 24 * 3600)
+CACHE_VALIDATOR_PATH = _env_str("CACHE_VALIDATOR_PATH", f"{CACHE_PATH}-validators" if CACHE_PATH else "")
+CACHE_VALIDATOR_MAX_ENTRIES = _env_int("CACHE_VALIDATOR_MAX_ENTRIES", 1024)
+CACHE_VALIDATOR_MAX_BYTES = _env_int("CACHE_VALIDATOR_MAX_BYTES", 32 * 1024 * 1024)
+
+# Response JSON encoder: "auto" uses orjson when installed, else the stdlib encoder
+JSON_BACKEND = _env_str("JSON_BACKEND", "auto")
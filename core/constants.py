@@ -1,8 +1,12 @@
-BASE_URL= "https://jkanime.net/"
-SEARCH_URL = "https://jkanime.net/buscar/"
-SEARCH_BY_CHARACTER_URL = "https://jkanime.net/letra/"
-SCHEDULE_URL= "https://jkanime.net/horario/"
-GENRE_URL="https://jkanime.net/genero/"
-MOVIES_URL= "https://jkanime.net/tipo/pelicula"
-OVAS_URL= "https://jkanime.net/tipo/ova"
-DIRECTORY_URL = "https://jkanime.net/directorio"
\ No newline at end of file
+import os
+
+# JKANIME_BASE_URL points the scraper somewhere else, e.g. the benchmark replay server
+BASE_URL= os.environ.get("JKANIME_BASE_URL", "https://jkanime.net/")
+SEARCH_URL = f"{BASE_URL}buscar/"
+SEARCH_BY_CHARACTER_URL = f"{BASE_URL}letra/"
+SCHEDULE_URL= f"{BASE_URL}horario/"
+GENRE_URL=f"{BASE_URL}genero/"
+TYPE_URL= f"{BASE_URL}tipo/"
+MOVIES_URL= f"{TYPE_URL}pelicula"
+OVAS_URL= f"{TYPE_URL}ova"
+DIRECTORY_URL = f"{BASE_URL}directorio"
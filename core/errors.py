@@ -0,0 +1,4 @@
+class UpstreamError(Exception):
+    """
+    jkanime.net could not be scraped (network error, 5xx or unexpected page)
+    """
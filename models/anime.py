@@ -1,6 +1,6 @@
 from . import (dataclass, Union, Optional)
 
-@dataclass
+@dataclass(slots=True)
 class Anime:
     id: Union[str, int]
     title: str 
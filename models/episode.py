@@ -1,5 +1,5 @@
 from . import (dataclass, Union, Optional)
-@dataclass
+@dataclass(slots=True)
 class Episode:
     id: Union[str, int]
     anime: str
@@ -2,10 +2,24 @@ from flask import request
 from flask_restful import Resource, reqparse
 from http import HTTPStatus
 from services.jkanime_service import JKAnimeService
+from core import config
+from core.errors import UpstreamError
 from models.anime import Anime
+from utils.event_loop import run_async
+from utils.http_cache import cache_control
+
+
+def public_info(info: dict) -> dict:
+    """
+    An anime record as the API serves it. fetched_at is bookkeeping, it
+    would change the ETag on every scrape.
+    """
+    return {key: value for key, value in info.items() if key != 'fetched_at'}
 
 
 class AnimeListResource(Resource):
+    cache_control = cache_control(config.CACHE_TTLS['directory'])
+
     def __init__(self):
         self.service = JKAnimeService()
         self.parser = reqparse.RequestParser()
@@ -26,23 +40,77 @@ class AnimeListResource(Resource):
             if result['titles']:
                 return {
                     'data': result['titles'],
-                    'pagination': result['pagination']
+                    'pagination': result['pagination'],
+                    'index_generation': result['index_generation']
                 }
             return {'message': 'titles not found'}, HTTPStatus.NOT_FOUND
         except Exception as e:
             return {'error': str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR
 
+class AnimeInfoResource(Resource):
+    cache_control = cache_control(config.CACHE_TTLS['anime'])
+
+    def __init__(self):
+        self.service = JKAnimeService()
+
+    def get(self, anime_id: str):
+        try:
+            info = run_async(self.service.get_anime_info(anime_id, strict=True))
+            if info.get('title') or info['episode_ranges']:
+                return {'data': public_info(info)}
+            return {'message': 'anime not found'}, HTTPStatus.NOT_FOUND
+        except UpstreamError as e:
+            # jkanime is down or failing, not a missing anime
+            return {'error': str(e)}, HTTPStatus.BAD_GATEWAY
+        except Exception as e:
+            return {'error': str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR
+
 class AnimeResource(Resource):
+    cache_control = cache_control(config.CACHE_TTLS['search'])
+
     def __init__(self):
         self.service = JKAnimeService()
 
     def get(self, query: str, page: int):
         try:
-            search_results = self.service.search_anime(query, page)
+            result = self.service.search(query, page)
+            search_results = result['titles']
             if search_results:
                 return {
-                    'data': [anime.data for anime in search_results]
+                    'data': search_results,
+                    'index_generation': result['index_generation']
                 }
             return {'message': 'animes not found'}, HTTPStatus.NOT_FOUND
         except Exception as e:
-            return {'error': str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR
\ No newline at end of file
+            return {'error': str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+class CategoryListResource(Resource):
+    cache_control = cache_control(config.CACHE_TTLS['listing'])
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.service = JKAnimeService()
+        self.parser = reqparse.RequestParser()
+        self.parser.add_argument('cursor', type=str, default=None, location='args')
+
+    def get(self, value: str):
+        try:
+            args = self.parser.parse_args()
+            try:
+                result = self.service.list_category(self.kind, value, args['cursor'])
+            except ValueError as e:
+                return {'error': str(e)}, HTTPStatus.BAD_REQUEST
+
+            # The first page being empty means the category does not exist
+            if result['titles'] or args['cursor']:
+                return {
+                    'data': result['titles'],
+                    'pagination': {
+                        'current_page': result['page'],
+                        'total_items': len(result['titles']),
+                        'next_cursor': result['next_cursor']
+                    }
+                }
+            return {'message': 'animes not found'}, HTTPStatus.NOT_FOUND
+        except Exception as e:
+            return {'error': str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR
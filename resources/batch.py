@@ -0,0 +1,80 @@
+from flask import request
+from flask_restful import Resource
+from http import HTTPStatus
+from core import config
+from services.jkanime_service import JKAnimeService
+from resources.anime import public_info
+from utils.event_loop import run_async
+
+
+def _too_many(items: list):
+    if len(items) > config.BATCH_MAX_ITEMS:
+        return {'error': f'At most {config.BATCH_MAX_ITEMS} items per batch'}, HTTPStatus.BAD_REQUEST
+    return None
+
+
+class BatchEpisodesResource(Resource):
+    """
+    Server lists for many episodes in one call:
+    ``{"items": [{"anime_id": "one-piece", "episode": 1}, ...]}``.
+    Results are keyed ``"<anime_id>/<episode>"``, failed items carry an error.
+    """
+    def __init__(self):
+        self.service = JKAnimeService()
+
+    def post(self):
+        try:
+            body = request.get_json(silent=True) or {}
+            items = body.get('items')
+            if not isinstance(items, list) or not items:
+                return {'error': 'items must be a non-empty list'}, HTTPStatus.BAD_REQUEST
+            error = _too_many(items)
+            if error:
+                return error
+
+            pairs = []
+            for item in items:
+                if not isinstance(item, dict):
+                    return {'error': 'every item needs anime_id and episode'}, HTTPStatus.BAD_REQUEST
+                anime_id, episode = item.get('anime_id'), item.get('episode')
+                # bool is an int subclass, {"episode": true} is not episode 1
+                valid_episode = isinstance(episode, int) and not isinstance(episode, bool) and episode >= 1
+                if not isinstance(anime_id, str) or not anime_id or not valid_episode:
+                    return {'error': 'every item needs anime_id and episode'}, HTTPStatus.BAD_REQUEST
+                pairs.append((anime_id, episode))
+
+            results = run_async(self.service.batch_video_servers(pairs))
+            return {
+                'data': {f"{anime_id}/{episode}": result for (anime_id, episode), result in results.items()}
+            }
+        except Exception as e:
+            return {'error': str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+class BatchAnimesResource(Resource):
+    """
+    Metadata for many anime in one call: ``{"ids": ["one-piece", ...]}``.
+    Results are keyed by anime id, failed items carry an error.
+    """
+    def __init__(self):
+        self.service = JKAnimeService()
+
+    def post(self):
+        try:
+            body = request.get_json(silent=True) or {}
+            ids = body.get('ids')
+            if not isinstance(ids, list) or not ids or not all(isinstance(i, str) and i for i in ids):
+                return {'error': 'ids must be a non-empty list of anime ids'}, HTTPStatus.BAD_REQUEST
+            error = _too_many(ids)
+            if error:
+                return error
+
+            results = run_async(self.service.batch_anime_info(ids))
+            return {
+                'data': {
+                    anime_id: dict(result, data=public_info(result['data'])) if 'data' in result else result
+                    for anime_id, result in results.items()
+                }
+            }
+        except Exception as e:
+            return {'error': str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR
@@ -1,9 +1,19 @@
-import asyncio
-from flask_restful import Resource, reqparse
+from flask import Response, current_app, stream_with_context
+from flask_restful import Resource, inputs, reqparse
 from http import HTTPStatus
 from services.jkanime_service import JKAnimeService
+from core import config
+from utils.event_loop import BackgroundLoop, run_async
+from utils.http_cache import cache_control
+from utils.serialization import dumps
+
+# Degraded answers are cached here for the negative TTL only, the CDN must not keep them longer
+DEGRADED_CACHE_CONTROL = cache_control(config.CACHE_NEGATIVE_TTL, stale=0)
+
 
 class EpisodeListResource(Resource):
+    cache_control = cache_control(config.CACHE_TTLS['episodes'])
+
     def __init__(self):
         self.service = JKAnimeService()
         self.parser = reqparse.RequestParser()
@@ -19,43 +29,109 @@ class EpisodeListResource(Resource):
             if page < 1:
                 return {'error': 'Page number must be grater than 0'}, HTTPStatus.BAD_REQUEST
             
-            # Create event loop for async operations
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            # Get episodes with pagination
-            result = loop.run_until_complete(
+            # Get episodes with pagination on the shared event loop
+            result = run_async(
                 self.service.get_episodes_by_anime_id(anime_id, page)
             )
 
             if result['episodes']:
-                return {
+                body = {
                     'data': result['episodes'],
-                    'pagination': result['pagination']
+                    'pagination': result['pagination'],
+                    'degraded': result['degraded']
                 }
+                if result['degraded']:
+                    return body, HTTPStatus.OK, {'Cache-Control': DEGRADED_CACHE_CONTROL}
+                return body
             return {'message': 'episodes not found'}, HTTPStatus.NOT_FOUND
         except Exception as e:
             return {'error': str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR
 
 class EpisodeResource(Resource):
+    cache_control = cache_control(config.CACHE_TTLS['servers'])
+
     def __init__(self):
         self.service = JKAnimeService()
+        self.parser = reqparse.RequestParser()
+        # Seconds to wait for servers before answering with what has resolved
+        self.parser.add_argument('budget', type=float, default=None, location='args')
     
     def get(self, anime_id: str, number: int):
         try:
-            # Create event loop for async operations
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-            # Run the async function
+            args = self.parser.parse_args()
+            budget = args['budget'] if args['budget'] is not None else current_app.config['SERVERS_BUDGET']
+            if budget < 0:
+                return {'error': 'Budget must not be negative'}, HTTPStatus.BAD_REQUEST
 
-            search_results = loop.run_until_complete(
-                self.service.get_video_servers(anime_id, number)
+            # Run the async function on the shared event loop
+            result = run_async(
+                self.service.resolve_video_servers(anime_id, number, budget or None)
             )
-            if search_results:
-                return {'data': search_results}
+            # A partial answer may have nothing resolved yet, it is still not a 404
+            if result['servers'] or result['partial']:
+                body = {
+                    'data': result['servers'],
+                    'pending': result['pending'],
+                    'pending_page': result['pending_page'],
+                    'partial': result['partial'],
+                    'degraded': result['degraded']
+                }
+                # An incomplete answer must not be reused by clients or the CDN
+                if result['partial']:
+                    return body, HTTPStatus.OK, {'Cache-Control': 'no-store'}
+                if result['degraded']:
+                    return body, HTTPStatus.OK, {'Cache-Control': DEGRADED_CACHE_CONTROL}
+                return body
             return {'message': 'episode not found'}, HTTPStatus.NOT_FOUND
         
         except Exception as e:
             return {'error': str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR
-        
\ No newline at end of file
+        
+
+class EpisodeStreamResource(Resource):
+    """
+    Episodes written as NDJSON lines or Server-Sent Events as soon as each
+    one resolves, instead of waiting for the whole page. ``all=true`` streams
+    the whole series, capped at STREAM_MAX_EPISODES episodes.
+    """
+    def __init__(self):
+        self.service = JKAnimeService()
+        self.parser = reqparse.RequestParser()
+        self.parser.add_argument('page', type=int, default=1, location='args')
+        self.parser.add_argument('all', type=inputs.boolean, default=False, location='args')
+        self.parser.add_argument('format', choices=('ndjson', 'sse'), default='ndjson', location='args')
+
+    @staticmethod
+    def _ndjson(event: dict) -> bytes:
+        return dumps(event) + b"\n"
+
+    @staticmethod
+    def _sse(event: dict) -> bytes:
+        return b"event: " + event['event'].encode() + b"\ndata: " + dumps(event) + b"\n\n"
+
+    def get(self, anime_id: str):
+        args = self.parser.parse_args()
+        page = args['page']
+        if page < 1:
+            return {'error': 'Page number must be greater than 0'}, HTTPStatus.BAD_REQUEST
+        max_episodes = None
+        if args['all']:
+            page = None
+            max_episodes = current_app.config['STREAM_MAX_EPISODES']
+
+        sse = args['format'] == 'sse'
+        encode = self._sse if sse else self._ndjson
+        events = BackgroundLoop().iterate(self.service.iter_episodes(anime_id, page, max_episodes))
+
+        def generate():
+            try:
+                for event in events:
+                    yield encode(event)
+            except Exception as e:
+                yield encode({'event': 'error', 'error': str(e)})
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream' if sse else 'application/x-ndjson',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
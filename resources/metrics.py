@@ -0,0 +1,11 @@
+from flask import Response
+from flask_restful import Resource
+from utils.metrics import registry
+
+
+class MetricsResource(Resource):
+    """
+    Metrics in the Prometheus text exposition format.
+    """
+    def get(self):
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,10 @@
+from flask_restful import Resource
+from services.warmer import ScheduleWarmer
+
+
+class WarmerStatusResource(Resource):
+    def __init__(self):
+        self.warmer = ScheduleWarmer()
+
+    def get(self):
+        return {'data': self.warmer.status()}
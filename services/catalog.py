@@ -0,0 +1,332 @@
+"""
+Local index of the whole jkanime directory.
+
+The directory pages are crawled through ``JKAnimeScraper.get_all`` and stored
+as numbered generations in a SQLite file. Each worker loads the current
+generation into memory, so listing and search lookups never leave the
+process. Run a crawl with:
+
+    python -m services.catalog rebuild
+    python -m services.catalog refresh --pages 3
+"""
+
+import argparse
+import bisect
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional, Set
+from core import config
+from utils.scraper import JKAnimeScraper
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('id', 'title', 'image', 'synopsis', 'type')
+
+
+def normalize(text: Optional[str]) -> str:
+    """
+    Lowercase and strip accents so "Kimetsu no Yaibá" matches "yaiba".
+    """
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Normalized words of a title or id, "kimetsu-no-yaiba" gives three.
+    """
+    return re.findall(r'[^\W_]+', normalize(text))
+
+
+class CatalogIndex:
+    """
+    Generation-numbered snapshot of the directory.
+    Writers build a complete new generation and switch the pointer in one
+    transaction, readers keep serving the previous one until they reload.
+    """
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(CatalogIndex, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, path: Optional[str] = None):
+        if not self._initialized:
+            self.path = path or config.CATALOG_PATH
+            self.search_page_size = config.CATALOG_SEARCH_PAGE_SIZE
+            self.reload_interval = config.CATALOG_RELOAD_INTERVAL
+            self.generation: Optional[int] = None
+            self.page_size = 0
+            self._records: List[Dict] = []
+            # Inverted index: sorted vocabulary and the record positions of each token
+            self._tokens: List[str] = []
+            self._postings: Dict[str, Set[int]] = {}
+            self._checked_at = 0.0
+            self._lock = threading.Lock()
+            self._refresher: Optional[threading.Thread] = None
+            self._stop = threading.Event()
+            self._initialized = True
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS titles ("
+            "generation INTEGER NOT NULL, position INTEGER NOT NULL, "
+            "id TEXT, title TEXT, image TEXT, synopsis TEXT, type TEXT, "
+            "PRIMARY KEY (generation, position))"
+        )
+        return conn
+
+    @staticmethod
+    def _meta(conn: sqlite3.Connection, key: str) -> Optional[str]:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    # Reading
+
+    @property
+    def ready(self) -> bool:
+        self._maybe_reload()
+        return self.generation is not None
+
+    def _maybe_reload(self) -> None:
+        """
+        Pick up a generation written by another process, at most once per
+        ``reload_interval`` seconds.
+        """
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        if not os.path.exists(self.path):
+            return
+        conn = self._connect()
+        try:
+            current = self._meta(conn, 'generation')
+            if current is not None and int(current) != self.generation:
+                self._load(conn, int(current))
+        finally:
+            conn.close()
+
+    def _load(self, conn: sqlite3.Connection, generation: int) -> None:
+        rows = conn.execute(
+            "SELECT id, title, image, synopsis, type FROM titles WHERE generation = ? ORDER BY position",
+            (generation,),
+        ).fetchall()
+        records = [dict(zip(FIELDS, row)) for row in rows]
+        postings: Dict[str, Set[int]] = {}
+        for position, record in enumerate(records):
+            for token in tokenize(record['title']) + tokenize(record['id']):
+                postings.setdefault(token, set()).add(position)
+        page_size = int(self._meta(conn, 'page_size') or 0)
+        with self._lock:
+            self._records = records
+            self._tokens = sorted(postings)
+            self._postings = postings
+            self.page_size = page_size
+            self.generation = generation
+
+    def page(self, page: int) -> Optional[Dict]:
+        """
+        Titles of a directory page, or None when the index is not built.
+        """
+        if not self.ready:
+            return None
+        with self._lock:
+            start = (page - 1) * self.page_size
+            return {
+                'titles': self._records[start:start + self.page_size],
+                'generation': self.generation,
+            }
+
+    def _matching(self, word: str) -> Set[int]:
+        """
+        Positions of the records with a token starting with ``word``.
+        """
+        start = bisect.bisect_left(self._tokens, word)
+        end = bisect.bisect_left(self._tokens, word + '\uffff', start)
+        if end - start == 1:
+            return self._postings[self._tokens[start]]
+        return set().union(*(self._postings[token] for token in self._tokens[start:end]))
+
+    def search(self, query: str, page: int) -> Optional[Dict]:
+        """
+        Titles with a word starting with each word of ``query``, in directory
+        order, or None when the index is not built.
+        """
+        if not self.ready:
+            return None
+        words = tokenize(query)
+        with self._lock:
+            positions: Optional[Set[int]] = None
+            for word in words:
+                found = self._matching(word)
+                positions = found if positions is None else positions & found
+                if not positions:
+                    break
+            ordered = range(len(self._records)) if positions is None else sorted(positions)
+            start = (page - 1) * self.search_page_size
+            titles = [self._records[position] for position in ordered[start:start + self.search_page_size]]
+            total = len(ordered)
+            generation = self.generation
+        return {
+            'titles': titles,
+            'total': total,
+            'generation': generation,
+        }
+
+    def stats(self) -> Dict:
+        return {'generation': self.generation, 'titles': len(self._records), 'page_size': self.page_size}
+
+    # Writing
+
+    @staticmethod
+    def _fetch_page(scraper: JKAnimeScraper, page: int) -> List[Dict]:
+        # Bypass the scrape cache and its fallback, a failed page must abort the crawl
+        return scraper.get_all(page, use_cache=False)
+
+    def _write(self, records: List[Dict], page_size: int) -> int:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            previous = self._meta(conn, 'generation')
+            generation = int(previous) + 1 if previous is not None else 1
+            conn.executemany(
+                "INSERT INTO titles (generation, position, id, title, image, synopsis, type) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (generation, position, *(record.get(field) for field in FIELDS))
+                    for position, record in enumerate(records)
+                ],
+            )
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('generation', ?)", (str(generation),))
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('page_size', ?)", (str(page_size),))
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('built_at', ?)", (str(time.time()),))
+            conn.execute("DELETE FROM titles WHERE generation < ?", (generation,))
+            conn.execute("COMMIT")
+            self._load(conn, generation)
+            return generation
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def rebuild(self, scraper: Optional[JKAnimeScraper] = None, max_pages: Optional[int] = None) -> int:
+        """
+        Crawl every directory page and write them as a new generation.
+        """
+        scraper = scraper or JKAnimeScraper()
+        records: List[Dict] = []
+        page_size = 0
+        page = 1
+        while max_pages is None or page <= max_pages:
+            titles = self._fetch_page(scraper, page)
+            if not titles:
+                break
+            page_size = page_size or len(titles)
+            records.extend(titles)
+            page += 1
+        if not records:
+            raise Exception("Directory crawl returned no titles, keeping the current index")
+        return self._write(records, page_size)
+
+    def refresh(self, scraper: Optional[JKAnimeScraper] = None, pages: Optional[int] = None) -> int:
+        """
+        Re-crawl the first pages only: new titles are put in front in
+        directory order and known titles get their fields updated.
+        Falls back to a full rebuild when there is no index yet.
+        """
+        if not self.ready:
+            return self.rebuild(scraper)
+        scraper = scraper or JKAnimeScraper()
+        pages = pages or config.CATALOG_REFRESH_PAGES
+
+        fresh: List[Dict] = []
+        for page in range(1, pages + 1):
+            titles = self._fetch_page(scraper, page)
+            if not titles:
+                break
+            fresh.extend(titles)
+
+        with self._lock:
+            records = list(self._records)
+            page_size = self.page_size
+        updated = {record['id']: record for record in fresh}
+        known = {record['id'] for record in records}
+        new = [record for record in fresh if record['id'] not in known]
+        merged = new + [updated.get(record['id'], record) for record in records]
+        return self._write(merged, page_size)
+
+    def start_refresher(self, interval: float) -> None:
+        """
+        Refresh the index in a daemon thread every ``interval`` seconds.
+        Only one process per node crawls at a time, the others just reload.
+        """
+        if self._refresher is not None or interval <= 0:
+            return
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                if not self._claim_lease(interval):
+                    continue
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.warning("Error refreshing catalog index: %s", e)
+
+        self._refresher = threading.Thread(target=run, name="catalog-refresh", daemon=True)
+        self._refresher.start()
+
+    def _claim_lease(self, interval: float) -> bool:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            lease = self._meta(conn, 'refresh_lease')
+            now = time.time()
+            if lease is not None and float(lease) > now:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('refresh_lease', ?)", (str(now + interval / 2),))
+            conn.execute("COMMIT")
+            return True
+        finally:
+            conn.close()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the local catalog index")
+    parser.add_argument('command', choices=['rebuild', 'refresh'])
+    parser.add_argument('--pages', type=int, default=None, help="pages to crawl (refresh) or the maximum (rebuild)")
+    parser.add_argument('--path', default=None, help="index file, defaults to JKANIME_CATALOG_PATH")
+    args = parser.parse_args()
+
+    index = CatalogIndex(args.path)
+    start = time.perf_counter()
+    if args.command == 'rebuild':
+        generation = index.rebuild(max_pages=args.pages)
+    else:
+        generation = index.refresh(pages=args.pages)
+    stats = index.stats()
+    print(f"Generation {generation}: {stats['titles']} titles in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
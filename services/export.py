@@ -0,0 +1,344 @@
+"""
+Resumable export of the jkanime catalog for offline analysis.
+
+Directory pages are crawled through ``JKAnimeService.get_all`` and written
+as they arrive, optionally with the server lists of the newest episodes of
+every title. Progress is checkpointed, an interrupted run started again
+with the same arguments continues after the last checkpoint:
+
+    python -m services.export --output dump --format jsonl --episodes 2
+    python -m services.export --output dump --format parquet --concurrency 8 --rate 4
+
+JSONL writes ``titles.jsonl`` and ``episodes.jsonl``; parquet (needs the
+optional ``pyarrow`` package) writes numbered part files under ``titles/``
+and ``episodes/``.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from core import config
+from models.anime import Anime
+from services.jkanime_service import JKAnimeService
+from utils.concurrency import TokenBucket, bounded_gather
+from utils.event_loop import run_async
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+TITLE_FIELDS = ('id', 'title', 'image', 'synopsis', 'type', 'page')
+EPISODE_FIELDS = ('anime_id', 'episode', 'server', 'url', 'partial')
+
+
+class JsonlWriter:
+    """
+    Appends records to a JSONL file. Its state is the byte offset at the
+    last commit, restoring truncates whatever was written after it.
+    """
+    empty = {'offset': 0}
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'a+', encoding='utf-8')
+
+    def write(self, records: List[Dict]) -> None:
+        for record in records:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def commit(self) -> Dict:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return {'offset': self._file.tell()}
+
+    def restore(self, state: Dict) -> None:
+        self._file.truncate(state['offset'])
+        self._file.seek(state['offset'])
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetWriter:
+    """
+    Buffers records and writes them as a new part file on every commit.
+    Its state is the number of parts, restoring removes later parts.
+    """
+    empty = {'parts': 0}
+
+    def __init__(self, path: str, fields: tuple):
+        if pyarrow is None:
+            raise Exception("The parquet format needs the pyarrow package")
+        self.path = path
+        self.fields = fields
+        self.parts = 0
+        self._rows: List[Dict] = []
+        os.makedirs(path, exist_ok=True)
+
+    def _part(self, number: int) -> str:
+        return os.path.join(self.path, f"part-{number:05d}.parquet")
+
+    def write(self, records: List[Dict]) -> None:
+        self._rows.extend(records)
+
+    def commit(self) -> Dict:
+        if self._rows:
+            columns = {field: [row.get(field) for row in self._rows] for field in self.fields}
+            pyarrow.parquet.write_table(pyarrow.table(columns), self._part(self.parts + 1))
+            self.parts += 1
+            self._rows = []
+        return {'parts': self.parts}
+
+    def restore(self, state: Dict) -> None:
+        self.parts = state['parts']
+        number = self.parts + 1
+        while os.path.exists(self._part(number)):
+            os.remove(self._part(number))
+            number += 1
+
+    def close(self) -> None:
+        pass
+
+
+class CatalogExporter:
+    """
+    Crawls directory pages ``concurrency`` at a time, starting at most
+    ``rate`` upstream calls per second, and streams the records to the
+    writers. Nothing but the current window of pages is held in memory.
+    """
+
+    def __init__(
+            self,
+            output: str,
+            format: str = 'jsonl',
+            episodes: int = 0,
+            concurrency: int = 4,
+            rate: float = 2.0,
+            max_pages: Optional[int] = None,
+            checkpoint_every: int = 10,
+            retries: int = 3,
+            service: Optional[JKAnimeService] = None,
+    ):
+        self.output = output
+        self.format = format
+        self.episodes = episodes
+        self.concurrency = concurrency
+        self.max_pages = max_pages
+        self.checkpoint_every = checkpoint_every
+        self.retries = retries
+        self.service = service or JKAnimeService()
+        self._bucket = TokenBucket(rate, burst=max(1, concurrency))
+        self.checkpoint_path = os.path.join(output, 'checkpoint.json')
+        self.page = 0
+        self.counts = {'titles': 0, 'episodes': 0, 'errors': 0}
+        self._started = 0.0
+        self._resumed_page = 0
+        self._resumed_titles = 0
+
+    # Writers and checkpoints
+
+    def _open_writers(self) -> Dict:
+        os.makedirs(self.output, exist_ok=True)
+        if self.format == 'parquet':
+            return {
+                'titles': ParquetWriter(os.path.join(self.output, 'titles'), TITLE_FIELDS),
+                'episodes': ParquetWriter(os.path.join(self.output, 'episodes'), EPISODE_FIELDS),
+            }
+        return {
+            'titles': JsonlWriter(os.path.join(self.output, 'titles.jsonl')),
+            'episodes': JsonlWriter(os.path.join(self.output, 'episodes.jsonl')),
+        }
+
+    def _resume(self, writers: Dict) -> None:
+        if not os.path.exists(self.checkpoint_path):
+            # A fresh run replaces the output of an earlier one
+            for writer in writers.values():
+                writer.restore(writer.empty)
+            return
+        with open(self.checkpoint_path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if checkpoint['format'] != self.format or checkpoint['episodes'] != self.episodes:
+            raise Exception("The checkpoint was written with other --format/--episodes, use --restart")
+        for name, writer in writers.items():
+            writer.restore(checkpoint['writers'][name])
+        self.page = checkpoint['page']
+        self.counts = checkpoint['counts']
+        self._resumed_titles = self.counts['titles']
+        logger.info("Resuming after page %d (%d titles)", self.page, self.counts['titles'])
+
+    def _checkpoint(self, writers: Dict, done: bool = False) -> None:
+        checkpoint = {
+            'format': self.format,
+            'episodes': self.episodes,
+            'page': self.page,
+            'counts': self.counts,
+            'writers': {name: writer.commit() for name, writer in writers.items()},
+            'done': done,
+            'saved_at': time.time(),
+        }
+        tmp = f"{self.checkpoint_path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    # Crawling
+
+    def _fetch_page(self, page: int) -> List[Anime]:
+        for attempt in range(self.retries + 1):
+            self._bucket.acquire_sync()
+            try:
+                # Bypass the scrape cache, it would answer every retry with the cached failure
+                return self.service.get_all(page, use_cache=False)['titles']
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                logger.warning("Page %d failed (%s), retrying", page, e)
+                time.sleep(2 ** attempt)
+
+    async def _episode_rows(self, anime_id: str) -> List[Dict]:
+        await self._bucket.acquire()
+        info = await self.service.get_anime_info(anime_id)
+        if info is None:
+            raise Exception("anime page unavailable")
+        total = info['total_episodes']
+        items = [(anime_id, number) for number in range(max(1, total - self.episodes + 1), total + 1)]
+        for _ in items:
+            await self._bucket.acquire()
+        results = await self.service.batch_video_servers(items)
+
+        rows = []
+        for (_, number), result in results.items():
+            if 'error' in result:
+                logger.warning("Episode %s of %s failed: %s", number, anime_id, result['error'])
+                self.counts['errors'] += 1
+                continue
+            rows.extend(
+                {'anime_id': anime_id, 'episode': number, 'server': s['server'], 'url': s['url'],
+                 'partial': result['partial']}
+                for s in result['data']
+            )
+        return rows
+
+    def _episodes_for(self, titles: List[Anime]) -> List[Dict]:
+        async def one(anime_id: str) -> List[Dict]:
+            try:
+                return await self._episode_rows(anime_id)
+            except Exception as e:
+                logger.warning("Episodes of %s failed: %s", anime_id, e)
+                self.counts['errors'] += 1
+                return []
+
+        async def all_titles() -> List[List[Dict]]:
+            return await bounded_gather((lambda t=t: one(t.id) for t in titles), self.concurrency)
+
+        return [row for rows in run_async(all_titles()) for row in rows]
+
+    def _estimated_pages(self) -> Optional[int]:
+        if self.max_pages:
+            return self.max_pages
+        stats = self.service.catalog.stats()
+        if stats['titles'] and stats['page_size']:
+            return -(-stats['titles'] // stats['page_size'])
+        return None
+
+    def _report(self) -> None:
+        elapsed = time.perf_counter() - self._started
+        done = self.counts['titles'] - self._resumed_titles
+        rate = done / elapsed if elapsed else 0.0
+        line = (
+            f"page {self.page}: {self.counts['titles']} titles, {self.counts['episodes']} episode rows, "
+            f"{self.counts['errors']} errors, {rate:.1f} titles/s"
+        )
+        total = self._estimated_pages()
+        if total and self.page < total and done:
+            pages_per_second = (self.page - self._resumed_page) / elapsed
+            if pages_per_second > 0:
+                line += f", ETA {(total - self.page) / pages_per_second:.0f}s"
+        print(line, file=sys.stderr, flush=True)
+
+    def run(self) -> Dict:
+        """
+        Export until the first empty page (or ``max_pages``), returns the counts.
+        """
+        writers = self._open_writers()
+        try:
+            self._resume(writers)
+            self._resumed_page = self.page
+            self._started = time.perf_counter()
+            since_checkpoint = 0
+            finished = False
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="export") as pool:
+                while not finished:
+                    window = [self.page + i + 1 for i in range(self.concurrency)]
+                    if self.max_pages:
+                        window = [page for page in window if page <= self.max_pages]
+                    if not window:
+                        break
+                    # Pages of a window are fetched together and written in order
+                    for titles in pool.map(self._fetch_page, window):
+                        if not titles:
+                            finished = True
+                            break
+                        page = self.page + 1
+                        writers['titles'].write([dict(title.data, page=page) for title in titles])
+                        self.counts['titles'] += len(titles)
+                        if self.episodes:
+                            rows = self._episodes_for(titles)
+                            writers['episodes'].write(rows)
+                            self.counts['episodes'] += len(rows)
+                        self.page = page
+                        since_checkpoint += 1
+                        if since_checkpoint >= self.checkpoint_every:
+                            self._checkpoint(writers)
+                            since_checkpoint = 0
+                        self._report()
+            self._checkpoint(writers, done=True)
+            return self.counts
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the jkanime catalog")
+    parser.add_argument('--output', required=True, help="output directory")
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], default='jsonl')
+    parser.add_argument('--episodes', type=int, default=0, help="export servers of the newest N episodes per title")
+    parser.add_argument('--pages', type=int, default=None, help="stop after this many directory pages")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=2.0, help="upstream calls started per second")
+    parser.add_argument('--checkpoint-every', type=int, default=10, help="pages between checkpoints")
+    parser.add_argument('--restart', action='store_true', help="ignore the checkpoint and start over")
+    args = parser.parse_args()
+    logging.basicConfig(level=config.LOG_LEVEL)
+
+    exporter = CatalogExporter(
+        args.output,
+        format=args.format,
+        episodes=args.episodes,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        max_pages=args.pages,
+        checkpoint_every=args.checkpoint_every,
+    )
+    if args.restart and os.path.exists(exporter.checkpoint_path):
+        os.remove(exporter.checkpoint_path)
+    start = time.perf_counter()
+    counts = exporter.run()
+    print(
+        f"Exported {counts['titles']} titles and {counts['episodes']} episode rows "
+        f"in {time.perf_counter() - start:.1f}s ({counts['errors']} errors)"
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,39 @@
-from typing import List, Optional, Union, Dict
+import base64
+import json
+from typing import AsyncIterator, List, Optional, Tuple, Union, Dict
+from core import config
 from models.anime import Anime
 from models.episode import Episode
+from utils.cache import DegradedResult
+from utils.concurrency import bounded_gather
 from utils.scraper import JKAnimeScraper
+from utils.singleflight import flights
+from services.catalog import CatalogIndex
+
+
+def encode_cursor(kind: str, value: str, page: int) -> str:
+    """
+    Opaque cursor of a listing page.
+    """
+    raw = json.dumps({'k': kind, 'v': value, 'p': page}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, kind: str, value: str) -> int:
+    """
+    The page a cursor points to. Raises ValueError when it is malformed or
+    was issued for another listing.
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        page = data['p']
+        matches = data['k'] == kind and data['v'] == value
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+    if not matches or not isinstance(page, int) or page < 1:
+        raise ValueError("Invalid cursor")
+    return page
+
 
 class JKAnimeService:
     EPISODES_PER_PAGE = 12
@@ -15,55 +47,192 @@ class JKAnimeService:
     def __init__(self):
         if not self._initialized:
             self.__scraper = JKAnimeScraper()
+            self.catalog = CatalogIndex()
             self._initialized = True
     
-    def get_all(self, page: int):
+    def get_all(self, page: int, use_cache: bool = True):
         """
-        Returns all titles by pagination
+        Returns all titles by pagination. ``use_cache=False`` reads the page
+        from jkanime, skipping the catalog index and the scrape cache, and
+        raises on an upstream failure instead of returning an empty page.
         """
         try:
-            titles = self.__scraper.get_all(page)
+            # Serve from the local catalog index when it has been built
+            indexed = self.catalog.page(page) if use_cache else None
+            if indexed is not None:
+                titles = indexed['titles']
+                generation = indexed['generation']
+            else:
+                titles = self.__scraper.get_all(page, use_cache=use_cache)
+                generation = None
 
-            # Convert the raw data into Anime objects
-            anime_list = []
-            for anime_data in titles:
-                anime = Anime(
+            # Convert the raw data into Anime objects, serialized as they are
+            anime_list = [
+                Anime(
                     id=anime_data.get('id'),
                     title=anime_data.get('title'),
                     image=anime_data.get('image'),
                     synopsis=anime_data.get('synopsis'),
                     type=anime_data.get('type')
                 )
-                anime_list.append(anime.data)
-            
+                for anime_data in titles
+            ]
+
             return {
                 'titles': anime_list,
                 'pagination': {
                     'current_page': page,
                     'total_items': len(anime_list)
-                }
+                },
+                'index_generation': generation
             }
         except Exception as e:
             raise Exception(f"Error fetching titles: {str(e)}")
         
 
     
+    @property
+    def cache(self):
+        """
+        The scrape cache shared with the scraper
+        """
+        return self.__scraper._cache
+
+    def stats(self) -> Dict:
+        """
+        Cache hit/miss counters per tier and coalesced calls per operation
+        """
+        return {
+            'cache': self.cache.stats(),
+            'validators': self.__scraper._validators.stats(),
+            'coalescing': flights.stats(),
+            'catalog': self.catalog.stats(),
+            'mirrors': self.__scraper._health.snapshot(),
+        }
+
+    def invalidate_anime(self, anime_id: Union[str, int]) -> int:
+        """
+        Drop cached episodes and servers of an anime so the next call scrapes it again
+        """
+        return self.__scraper.invalidate_anime(anime_id)
+
     def search_anime(self, query: str, page: int) -> List[Anime]:
         """
         Search for anime by query and page number
         """
-        return self.__scraper.search_anime(query, page)
+        return self.search(query, page)['titles']
+
+    def search(self, query: str, page: int) -> Dict:
+        """
+        Search the local catalog index, or jkanime when the index is not
+        built or has no match. Returns the titles and the index generation
+        that served them (None for upstream). The source is picked from the
+        whole query, not the page, so every page of a query comes from the
+        same one and pages past the local matches are empty.
+        """
+        indexed = self.catalog.search(query, page)
+        if indexed is not None and indexed['total']:
+            return {
+                'titles': [Anime(**record) for record in indexed['titles']],
+                'index_generation': indexed['generation'],
+            }
+        return {
+            'titles': self.__scraper.search_anime(query, page),
+            'index_generation': None,
+        }
     
+    def list_category(self, kind: str, value: str, cursor: Optional[str] = None) -> Dict:
+        """
+        A page of a genre, type or letter listing. ``cursor`` comes from the
+        ``next_cursor`` of the previous page (first page without one); it is
+        None once a page comes back empty. Reading a page prefetches the next.
+        """
+        page = decode_cursor(cursor, kind, value) if cursor else 1
+        titles = self.__scraper.get_listing(kind, value, page)
+        next_cursor = None
+        if titles:
+            next_cursor = encode_cursor(kind, value, page + 1)
+            self.__scraper.prefetch_listing(kind, value, page + 1)
+        return {'titles': titles, 'page': page, 'next_cursor': next_cursor}
+
     def get_video_servers(self, anime_id: str, episode: int) -> List[Episode]:
         """
         Get video servers for a specific anime episode
         """
         return self.__scraper.get_video_servers(anime_id, episode)
     
+    async def resolve_video_servers(self, anime_id: str, episode: int, budget: Optional[float] = None) -> Dict:
+        """
+        Get video servers within a latency budget, with the still pending ones
+        """
+        return await self.__scraper.resolve_video_servers(anime_id, episode, budget)
+
+    async def get_anime_info(self, anime_id: Union[str, int], strict: bool = False) -> Optional[Dict]:
+        """
+        Cached metadata of an anime: title fields, episode ranges and count.
+        None when the page could not be scraped, unless ``strict`` raises the error.
+        """
+        return await self.__scraper.get_anime_info(anime_id, strict=strict)
+
+    @staticmethod
+    async def _batch(keys: List, resolve, concurrency: Optional[int] = None) -> Dict:
+        """
+        Resolve every distinct key once through one bounded pipeline.
+        Returns ``{key: {'data': ..., 'partial': bool}}``, or
+        ``{key: {'error': message}}`` for the items that failed.
+        """
+        unique = list(dict.fromkeys(keys))
+        results = await bounded_gather(
+            (lambda key=key: resolve(key) for key in unique),
+            concurrency or config.BATCH_CONCURRENCY,
+            return_exceptions=True,
+        )
+        batch = {}
+        for key, result in zip(unique, results):
+            if isinstance(result, DegradedResult):
+                batch[key] = {'data': result.value, 'partial': True}
+            elif isinstance(result, Exception):
+                batch[key] = {'error': str(result)}
+            else:
+                batch[key] = {'data': result, 'partial': False}
+        return batch
+
+    async def batch_video_servers(self, items: List[Tuple[str, int]]) -> Dict:
+        """
+        Server lists for many ``(anime_id, episode)`` pairs, keyed by pair
+        """
+        async def resolve(item: Tuple[str, int]) -> List[Dict]:
+            anime_id, episode = item
+            servers = await self.__scraper.get_video_servers(anime_id, episode, strict=True)
+            if not servers:
+                raise Exception(f"No servers found for {anime_id} episode {episode}")
+            return servers
+        return await self._batch(items, resolve)
+
+    async def batch_anime_info(self, anime_ids: List[str]) -> Dict:
+        """
+        Metadata records for many anime ids, keyed by id
+        """
+        async def resolve(anime_id: str) -> Dict:
+            return await self.__scraper.get_anime_info(anime_id, strict=True)
+        return await self._batch(anime_ids, resolve)
+
+    def iter_episodes(
+            self,
+            anime_id: Union[str, int],
+            page: Optional[int] = None,
+            max_episodes: Optional[int] = None,
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream pagination, per-episode server lists and a summary as they resolve
+        """
+        return self.__scraper.iter_episodes(anime_id, page, max_episodes)
+
     async def get_episodes_by_anime_id(self, anime_id: Union[str, int], page: int = 1) -> Dict:
         """
         Get episodes for an anime with pagination
-        Returns a dictionary containing episodes and pagination info
+        Returns a dictionary containing episodes, pagination info and whether
+        some episodes or servers failed (``degraded``)
         """
         try:
             # Calculate episode ranges
@@ -71,12 +240,17 @@ class JKAnimeService:
             end_episode = page * self.EPISODES_PER_PAGE
 
              # Scrap episodes for the current page
-            result = await self.__scraper.get_episodes_by_anime_id(anime_id, page)
+            degraded = False
+            try:
+                result = await self.__scraper.get_episodes_by_anime_id(anime_id, page, strict=True)
+            except DegradedResult as partial:
+                result = partial.value
+                degraded = True
             
             if not result['episodes']:
                 raise Exception(f"No episodes found for anime {anime_id} on page {page}")
                 
-            return result
+            return dict(result, degraded=degraded)
         except Exception as e:
             raise Exception(f"Error fetching episodes: {str(e)}")
 
@@ -0,0 +1,148 @@
+"""
+Background warmer for newly aired episodes.
+
+Every ``WARMER_INTERVAL`` seconds the schedule page is read, and the newest
+episode of every title airing today has its server list resolved through
+the regular scraper, so the shared cache already holds it when the first
+viewers arrive.
+"""
+
+import asyncio
+import logging
+import time
+import unicodedata
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+from core import config
+from utils.cache import DegradedResult
+from utils.concurrency import TokenBucket, bounded_gather
+from utils.event_loop import BackgroundLoop
+from utils.scraper import JKAnimeScraper
+
+logger = logging.getLogger(__name__)
+
+# Weekday names of the schedule page, Monday first like time.struct_time.tm_wday
+WEEKDAYS = ('lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo')
+
+
+def weekday(name: Optional[str]) -> Optional[int]:
+    if not name:
+        return None
+    plain = ''.join(c for c in unicodedata.normalize('NFKD', name) if not unicodedata.combining(c))
+    plain = plain.strip().lower()
+    return WEEKDAYS.index(plain) if plain in WEEKDAYS else None
+
+
+class ScheduleWarmer:
+    """
+    Periodically pre-resolves today's airing episodes on the background loop.
+    The warmer has its own concurrency limit and token bucket on top of the
+    scraper's per-host limiter, so it never takes over live traffic.
+    """
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(ScheduleWarmer, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(
+            self,
+            interval: float = config.WARMER_INTERVAL,
+            concurrency: int = config.WARMER_CONCURRENCY,
+            rate_limit: float = config.WARMER_RATE_LIMIT,
+    ):
+        if not self._initialized:
+            self.interval = interval
+            self.concurrency = concurrency
+            self._bucket = TokenBucket(rate_limit, burst=1)
+            self._scraper = JKAnimeScraper()
+            self._future: Optional[Future] = None
+            self.runs = 0
+            self.last_started: Optional[float] = None
+            self.last_finished: Optional[float] = None
+            self.last_error: Optional[str] = None
+            self.warmed: List[Dict] = []
+            self._initialized = True
+
+    def todays(self, schedule: List[Dict], today: Optional[int] = None) -> List[Dict]:
+        """
+        Schedule entries airing today with a known episode, one per title.
+        """
+        today = time.localtime().tm_wday if today is None else today
+        entries = {}
+        for entry in schedule:
+            if weekday(entry['day']) == today and entry['id'] and entry['episode']:
+                entries[entry['id']] = entry
+        return list(entries.values())
+
+    async def _warm(self, entry: Dict) -> Dict:
+        await self._bucket.acquire()
+        started = time.perf_counter()
+        item = {'id': entry['id'], 'title': entry['title'], 'episode': entry['episode']}
+        try:
+            # A new episode can be past the cached metadata, refresh it first
+            info = await self._scraper.get_anime_info(entry['id'], strict=True)
+            if entry['episode'] > info['total_episodes']:
+                await self._scraper.revalidate_anime_info(entry['id'], info)
+            servers = await self._scraper.get_video_servers(entry['id'], entry['episode'], strict=True)
+            item.update(ok=bool(servers), partial=False, servers=len(servers))
+        except DegradedResult as degraded:
+            item.update(ok=True, partial=True, servers=len(degraded.value))
+        except Exception as e:
+            item.update(ok=False, error=str(e))
+        item['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        item['warmed_at'] = time.time()
+        return item
+
+    async def warm_once(self) -> List[Dict]:
+        """
+        Read the schedule and resolve the newest episode of today's titles.
+        """
+        self.last_started = time.time()
+        try:
+            schedule = await self._scraper.get_schedule(strict=True)
+            entries = self.todays(schedule)
+            self.warmed = await bounded_gather(
+                (lambda entry=entry: self._warm(entry) for entry in entries),
+                self.concurrency,
+            )
+            self.last_error = None
+        except Exception as e:
+            logger.warning("Error warming schedule: %s", e)
+            self.last_error = str(e)
+        finally:
+            self.runs += 1
+            self.last_finished = time.time()
+        return self.warmed
+
+    async def _run(self) -> None:
+        while True:
+            await self.warm_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """
+        Start warming on the shared background loop, a no-op without an interval.
+        """
+        if self._future is not None or self.interval <= 0:
+            return
+        self._future = BackgroundLoop().submit(self._run())
+
+    def stop(self) -> None:
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+
+    def status(self) -> Dict:
+        return {
+            'enabled': self._future is not None,
+            'interval': self.interval,
+            'runs': self.runs,
+            'last_started': self.last_started,
+            'last_finished': self.last_finished,
+            'next_run': self.last_finished + self.interval if self._future and self.last_finished else None,
+            'last_error': self.last_error,
+            'warmed': self.warmed,
+        }
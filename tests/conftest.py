@@ -0,0 +1,49 @@
+"""
+The API and scraper run against the replay server, started before the app
+modules are imported since core.constants / core.config read the environment.
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+import pytest
+from benchmarks.replay_server import ReplayServer
+
+replay = ReplayServer(directory_pages=2).start()
+# Files the app would otherwise share with a real deployment under the system temp dir
+session_dir = tempfile.mkdtemp(prefix="jkanime-tests-")
+atexit.register(shutil.rmtree, session_dir, True)
+os.environ["JKANIME_BASE_URL"] = replay.base_url
+os.environ["JKANIME_CACHE_PATH"] = ""
+os.environ["JKANIME_CLEARANCE_PATH"] = ""
+os.environ["JKANIME_CATALOG_PATH"] = os.path.join(session_dir, "catalog.sqlite3")
+os.environ["JKANIME_UPSTREAM_RATE_LIMIT"] = "0"
+os.environ["JKANIME_UPSTREAM_PLAYER_RATE_LIMIT"] = "0"
+os.environ["JKANIME_LOG_LEVEL"] = "WARNING"
+
+from app import create_app  # noqa: E402
+from utils.health import MirrorHealth  # noqa: E402
+from utils.scraper import JKAnimeScraper  # noqa: E402
+
+app = create_app()
+
+
+@pytest.fixture(autouse=True)
+def isolate():
+    # Failures injected by a test, the circuits they opened and what was cached end with it
+    yield
+    replay.failures.clear()
+    scraper = JKAnimeScraper()
+    scraper._health = MirrorHealth()
+    scraper.clear_cache()
+
+
+@pytest.fixture
+def server() -> ReplayServer:
+    return replay
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
@@ -0,0 +1,14 @@
+def test_anime_info(client):
+    response = client.get('/animes/one-piece/info')
+
+    assert response.status_code == 200
+    assert response.get_json()['data']['episode_ranges']
+
+
+def test_an_upstream_outage_is_not_a_missing_anime(server, client):
+    server.failures['/upstream-down'] = 10
+
+    response = client.get('/animes/upstream-down/info')
+
+    assert response.status_code == 502
+    assert 'error' in response.get_json()
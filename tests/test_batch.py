@@ -0,0 +1,12 @@
+def test_a_boolean_is_not_an_episode_number(client):
+    response = client.post('/batch/episodes', json={'items': [{'anime_id': 'one-piece', 'episode': True}]})
+
+    assert response.status_code == 400
+
+
+def test_batch_animes_serves_the_same_record_as_the_info_route(client):
+    batch = client.post('/batch/animes', json={'ids': ['one-piece']}).get_json()['data']['one-piece']
+    info = client.get('/animes/one-piece/info').get_json()['data']
+
+    assert 'fetched_at' not in batch['data']
+    assert batch['data'] == info
@@ -0,0 +1,53 @@
+from utils.cache import MISSING, MemoryCache, SQLiteCache, TieredCache, anime_tag
+from utils.scraper import JKAnimeScraper
+
+
+def test_keyword_arguments_are_part_of_the_key():
+    key = JKAnimeScraper.search_anime.cache_key
+
+    assert key(query='naruto', page=1) != key(query='bleach', page=2)
+    assert key(query='naruto', page=1) == key('naruto', 1) == key('naruto', page=1)
+
+
+def test_a_keyword_call_is_cached_under_its_own_arguments(client):
+    scraper = JKAnimeScraper()
+
+    assert scraper.search_anime(query='naruto', page=1)
+
+    assert scraper._cache.get(JKAnimeScraper.search_anime.cache_key('naruto', 1)) is not MISSING
+    assert scraper._cache.get(JKAnimeScraper.search_anime.cache_key('bleach', 1)) is MISSING
+
+
+def worker(path) -> TieredCache:
+    return TieredCache(MemoryCache(), SQLiteCache(str(path)), invalidation_interval=0)
+
+
+def test_an_invalidation_reaches_the_memory_of_every_worker(tmp_path):
+    path = tmp_path / 'cache.sqlite3'
+    first, second = worker(path), worker(path)
+    first.set('servers:one-piece:1', 'cached', 3600, anime_tag('one-piece'))
+    first.set('servers:bleach:1', 'cached', 3600, anime_tag('bleach'))
+    assert second.get('servers:one-piece:1') == 'cached'
+    assert second.get('servers:bleach:1') == 'cached'
+
+    first.invalidate_tag(anime_tag('one-piece'))
+
+    assert second.get('servers:one-piece:1') is MISSING
+    assert second.get('servers:bleach:1') == 'cached'
+
+    first.clear()
+
+    assert second.memory.get('servers:bleach:1') == 'cached'
+    assert second.get('servers:bleach:1') is MISSING
+
+
+def test_use_cache_false_neither_reads_nor_stores(server, client):
+    scraper = JKAnimeScraper()
+    key = JKAnimeScraper.get_all.cache_key(1)
+    before = server.requests
+
+    assert scraper.get_all(1, use_cache=False)
+    assert scraper.get_all(1, use_cache=False)
+
+    assert server.requests == before + 2
+    assert scraper._cache.get(key) is MISSING
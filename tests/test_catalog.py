@@ -0,0 +1,46 @@
+import os
+import pytest
+from services.catalog import CatalogIndex
+from services.jkanime_service import JKAnimeService
+
+
+def title(position: int, name: str) -> dict:
+    return {'id': f"{name.lower().replace(' ', '-')}-{position}", 'title': name, 'image': None, 'synopsis': None, 'type': 'Serie'}
+
+
+@pytest.fixture
+def catalog():
+    catalog = CatalogIndex()
+    records = [title(i, 'Naruto Shippuden' if i % 2 else 'Kimetsu no Yaibá') for i in range(30)]
+    catalog._write(records, 12)
+    yield catalog
+    # Back to an unbuilt index for the other tests
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(catalog.path + suffix):
+            os.remove(catalog.path + suffix)
+    with catalog._lock:
+        catalog.generation = None
+        catalog._records, catalog._tokens, catalog._postings = [], [], {}
+
+
+def test_search_matches_word_prefixes_without_accents(catalog):
+    result = catalog.search('yaiba kimet', 1)
+
+    assert result['total'] == 15
+    assert [record['title'] for record in result['titles']] == ['Kimetsu no Yaibá'] * 12
+    assert catalog.search('ruto', 1)['total'] == 0
+
+
+def test_every_page_of_an_indexed_query_comes_from_the_index(catalog):
+    service = JKAnimeService()
+
+    pages = [service.search('naruto', page) for page in (1, 2, 3)]
+
+    assert [len(page['titles']) for page in pages] == [12, 3, 0]
+    assert all(page['index_generation'] == catalog.generation for page in pages)
+
+
+def test_a_query_without_local_matches_goes_upstream(catalog):
+    result = JKAnimeService().search('bleach', 1)
+
+    assert result['titles'] and result['index_generation'] is None
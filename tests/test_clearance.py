@@ -0,0 +1,50 @@
+import time
+from contextlib import contextmanager
+import pytest
+from utils.scraper import JKAnimeScraper
+
+
+@pytest.fixture
+def scraper(monkeypatch):
+    scraper = JKAnimeScraper()
+    monkeypatch.setattr(scraper._clearance, 'load', lambda: None)
+    monkeypatch.setattr(scraper._clearance, 'save', lambda user_agent, cookies: time.time())
+    yield scraper
+    scraper._scraper.cookies.clear()
+
+
+@pytest.fixture
+def locked(scraper, monkeypatch):
+    # One item per time the store lock was taken
+    taken = []
+
+    @contextmanager
+    def solving():
+        taken.append(True)
+        yield
+
+    monkeypatch.setattr(scraper._clearance, 'solving', solving)
+    return taken
+
+
+def set_clearance(scraper, value):
+    scraper._scraper.cookies.set('cf_clearance', value, domain='example.org', path='/', expires=time.time() + 3600)
+
+
+def test_a_valid_clearance_is_used_without_the_lock(scraper, locked, monkeypatch):
+    set_clearance(scraper, 'valid')
+    monkeypatch.setattr(scraper._scraper, 'get', lambda url, headers=None: 'page')
+
+    assert scraper._solve('http://example.org/') == 'page'
+    assert locked == []
+
+
+def test_a_challenge_is_solved_under_the_lock(scraper, locked, monkeypatch):
+    def get(url, headers=None):
+        set_clearance(scraper, 'solved')
+        return 'page'
+    monkeypatch.setattr(scraper._scraper, 'get', get)
+
+    assert scraper._solve('http://example.org/') == 'page'
+    assert locked == [True]
+    assert scraper.clearance_source == 'solved'
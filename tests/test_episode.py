@@ -0,0 +1,85 @@
+import json
+from core import config
+from utils.http_cache import cache_control
+from utils.scraper import JKAnimeScraper
+
+DESU = '/jkplayer/c1?u=aHR0cHM6Ly9taXJyb3IwLmV4YW1wbGUvdi8w&s=desu'
+
+
+def test_servers_with_a_failed_mirror_are_cached_briefly(server, client):
+    server.failures[DESU] = 10
+
+    response = client.get('/animes/degraded-servers/episodes/1')
+
+    assert response.status_code == 200
+    assert response.get_json()['degraded'] is True
+    assert response.headers['Cache-Control'] == cache_control(config.CACHE_NEGATIVE_TTL, stale=0)
+
+
+def test_a_page_with_a_failed_mirror_is_cached_briefly(server, client):
+    server.failures[DESU] = 100
+
+    response = client.get('/animes/degraded-page/episodes?page=1')
+
+    assert response.status_code == 200
+    assert response.get_json()['degraded'] is True
+    assert response.headers['Cache-Control'] == cache_control(config.CACHE_NEGATIVE_TTL, stale=0)
+
+
+def test_complete_servers_get_the_full_ttl(client):
+    response = client.get('/animes/complete-servers/episodes/1')
+
+    assert response.get_json()['degraded'] is False
+    assert response.headers['Cache-Control'] == cache_control(config.CACHE_TTLS['servers'])
+
+
+def test_a_mirror_behind_an_open_circuit_is_not_a_failure(client):
+    scraper = JKAnimeScraper()
+    for _ in range(scraper._health.failure_threshold):
+        scraper._health.record('desu', 0.1, ok=False)
+
+    response = client.get('/animes/open-circuit/episodes/1')
+
+    assert response.get_json()['degraded'] is False
+    assert response.headers['Cache-Control'] == cache_control(config.CACHE_TTLS['servers'])
+
+
+def test_a_failure_that_opens_the_circuit_is_not_retried(server, client):
+    scraper = JKAnimeScraper()
+    for _ in range(scraper._health.failure_threshold - 1):
+        scraper._health.record('desu', 0.1, ok=False)
+    server.failures[DESU] = 10
+
+    response = client.get('/animes/opening-circuit/episodes/1')
+
+    assert scraper._health.is_open('desu')
+    assert response.get_json()['degraded'] is False
+
+
+def stream_events(response):
+    return [json.loads(line) for line in response.get_data().splitlines() if line]
+
+
+def test_the_stream_defaults_to_the_first_page(client):
+    events = stream_events(client.get('/animes/stream-page/episodes/stream'))
+
+    assert events[0]['current_page'] == 1
+    assert len([event for event in events if event['event'] == 'episode']) == 12
+
+
+def test_the_whole_series_stream_is_capped(client, monkeypatch):
+    monkeypatch.setitem(client.application.config, 'STREAM_MAX_EPISODES', 20)
+
+    events = stream_events(client.get('/animes/stream-all/episodes/stream?all=true'))
+
+    assert events[0]['truncated'] is True
+    assert len([event for event in events if event['event'] == 'episode']) == 20
+
+
+def test_a_budget_spent_on_the_episode_page_reports_it_pending(server, client, monkeypatch):
+    monkeypatch.setattr(server, 'latency', 0.3)
+
+    body = client.get('/animes/slow-page/episodes/1?budget=0.05').get_json()
+
+    assert body['partial'] is True
+    assert body['pending_page'] is True and body['pending'] == []
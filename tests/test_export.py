@@ -0,0 +1,16 @@
+import json
+import os
+from services.export import CatalogExporter
+
+
+def test_a_transient_failure_is_retried_upstream(server, tmp_path, monkeypatch):
+    monkeypatch.setattr('services.export.time.sleep', lambda seconds: None)
+    server.failures['/directorio/2'] = 1
+
+    counts = CatalogExporter(str(tmp_path), concurrency=1, rate=100, retries=2).run()
+
+    assert server.failures['/directorio/2'] == 0
+    assert counts['titles'] > 0
+    with open(os.path.join(tmp_path, 'titles.jsonl'), encoding='utf-8') as f:
+        pages = {json.loads(line)['page'] for line in f}
+    assert pages == {1, 2}
@@ -0,0 +1,13 @@
+import pytest
+from benchmarks.parity import check_extractor, check_parity, fixtures
+from utils.extract import EXTRACTORS
+
+
+@pytest.mark.parametrize('name', sorted(EXTRACTORS))
+@pytest.mark.parametrize('fixture', fixtures())
+def test_fast_path_matches_full_parse(fixture, name):
+    assert check_extractor(fixture, name) is None
+
+
+def test_parity():
+    assert check_parity() == []
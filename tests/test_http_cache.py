@@ -0,0 +1,25 @@
+from core.constants import SEARCH_URL
+from utils.cache import MISSING
+from utils.http_cache import validator_key
+from utils.scraper import JKAnimeScraper
+
+
+def test_validators_are_kept_out_of_the_scrape_cache(client):
+    key = validator_key(f"{SEARCH_URL}naruto/1")
+
+    assert client.get('/animes/naruto/1').status_code == 200
+
+    scraper = JKAnimeScraper()
+    assert scraper._validators.get(key) is not MISSING
+    assert scraper._cache.get(key) is MISSING
+
+
+def test_a_304_reuses_the_stored_parse(server, client):
+    assert client.get('/animes/naruto/2').status_code == 200
+    JKAnimeScraper()._cache.clear()
+    before = server.not_modified
+
+    response = client.get('/animes/naruto/2')
+
+    assert response.status_code == 200 and response.get_json()['data']
+    assert server.not_modified == before + 1
@@ -0,0 +1,41 @@
+import time
+from services.jkanime_service import JKAnimeService
+from utils.cache import MISSING
+from utils.scraper import JKAnimeScraper
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_reading_a_page_prefetches_the_next(server):
+    service = JKAnimeService()
+    key = JKAnimeScraper.get_listing.cache_key('genre', 'prefetch', 2)
+
+    result = service.list_category('genre', 'prefetch')
+
+    assert result['titles'] and result['next_cursor']
+    assert wait_for(lambda: service.cache.get(key) is not MISSING)
+
+
+def test_listings_do_not_shadow_search(client):
+    adapter = client.application.url_map.bind('localhost')
+
+    assert adapter.match('/animes/type/1')[0] == 'animeresource'
+    assert adapter.match('/types/ova')[0] == 'type_listing'
+
+
+def test_listing_pages_follow_the_cursor(client):
+    first = client.get('/genres/accion').get_json()
+    cursor = first['pagination']['next_cursor']
+    second = client.get(f'/genres/accion?cursor={cursor}').get_json()
+    end = client.get(f"/genres/accion?cursor={second['pagination']['next_cursor']}").get_json()
+
+    assert first['data'] and second['pagination']['current_page'] == 2
+    assert end['data'] == [] and end['pagination']['next_cursor'] is None
+    assert client.get(f'/types/accion?cursor={cursor}').status_code == 400
@@ -0,0 +1,18 @@
+from core.constants import BASE_URL
+from utils.concurrency import HostRateLimiter
+from utils.scraper import JKAnimeScraper
+
+
+def test_player_fetches_do_not_take_page_tokens(monkeypatch):
+    scraper = JKAnimeScraper()
+    monkeypatch.setattr(scraper, '_rate_limiter', HostRateLimiter(10, 10))
+    monkeypatch.setattr(scraper, '_player_rate_limiter', HostRateLimiter(40, 48))
+
+    player = scraper._limiter(f"{BASE_URL}jkplayer/c1?u=x&s=desu")
+    page = scraper._limiter(f"{BASE_URL}one-piece/1")
+
+    assert player is scraper._player_rate_limiter and page is scraper._rate_limiter
+    # The iframes of a whole window of episodes start at once...
+    assert all(player.bucket(BASE_URL).reserve() == 0.0 for _ in range(48))
+    # ...and the page bucket is still full
+    assert all(page.bucket(BASE_URL).reserve() == 0.0 for _ in range(10))
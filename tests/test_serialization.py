@@ -0,0 +1,17 @@
+import json
+from models.anime import Anime
+from models.episode import Episode
+from utils import serialization
+
+
+def test_the_stdlib_backend_writes_models_as_dicts():
+    serialization.set_backend('json')
+    try:
+        anime = Anime(id='one-piece', title='One Piece', type='Serie')
+        episode = Episode(**{field: None for field in Episode.__dataclass_fields__})
+        body = json.loads(serialization.dumps({'data': [anime, anime], 'episode': episode}))
+    finally:
+        serialization.set_backend('auto')
+
+    assert body['data'] == [anime.data, anime.data]
+    assert set(body['episode']) == set(Episode.__dataclass_fields__)
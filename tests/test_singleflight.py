@@ -0,0 +1,47 @@
+import asyncio
+from utils.singleflight import SingleFlight
+
+
+def test_the_flight_is_cancelled_when_its_last_waiter_is():
+    async def scenario():
+        flights = SingleFlight()
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        async def work():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        first = asyncio.ensure_future(flights.do_async('op', 'key', work))
+        second = asyncio.ensure_future(flights.do_async('op', 'key', work))
+        await started.wait()
+
+        first.cancel()
+        await asyncio.sleep(0.01)
+        still_running = not cancelled.is_set()
+
+        second.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return still_running
+
+    assert asyncio.run(scenario())
+
+
+def test_a_finished_flight_is_shared():
+    async def scenario():
+        flights = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'result'
+
+        results = await asyncio.gather(*(flights.do_async('op', 'key', work) for _ in range(3)))
+        return results, calls, flights._waiters
+
+    results, calls, waiters = asyncio.run(scenario())
+    assert results == ['result'] * 3 and calls == [1] and waiters == {}
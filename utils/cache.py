@@ -0,0 +1,537 @@
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from core import config
+from core.errors import UpstreamError
+from utils.metrics import SCRAPE_CACHE
+from utils.singleflight import flights
+
+logger = logging.getLogger(__name__)
+
+# Sentinel returned by the backends on a miss, ``None`` is a valid value
+MISSING = object()
+# Bumped when the stored entry layout changes so old shared entries are ignored
+ENTRY_FORMAT = 2
+
+
+class MemoryCache:
+    """
+    In-process LRU tier with per-entry expiry.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[Any, float, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    del self._data[key]
+                self.stats['misses'] += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[0]
+
+    def set(self, key: str, value: Any, ttl: float, tag: Optional[str] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl, tag)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_tag(self, tag: str) -> int:
+        with self._lock:
+            keys = [key for key, entry in self._data.items() if entry[2] == tag]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache:
+    """
+    Shared local tier stored in one SQLite file.
+    Every worker on the node opens the same file, so a page scraped by one
+    worker is served to the others. Values are stored as JSON and the file
+    is trimmed to ``max_bytes`` by evicting the least recently used rows.
+    Invalidations are also logged in the file, for the other workers to
+    drop the same entries from their memory tier.
+    """
+
+    # Logged invalidations are kept this long, every live worker has read them by then
+    INVALIDATION_RETENTION = 3600
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "tag TEXT, size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_tag ON entries (tag)")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+            # A NULL tag records a clear()
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS invalidations ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, tag TEXT, invalidated_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, key: str) -> Any:
+        """
+        Return ``(value, seconds_left, tag)`` or ``MISSING``.
+        """
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, expires_at, tag FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            self.stats['misses'] += 1
+            return MISSING
+        conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        self.stats['hits'] += 1
+        return json.loads(row[0]), row[1] - now, row[2]
+
+    def get(self, key: str) -> Any:
+        entry = self.lookup(key)
+        return entry if entry is MISSING else entry[0]
+
+    def set(self, key: str, value: Any, ttl: float, tag: Optional[str] = None) -> None:
+        payload = json.dumps(value, separators=(',', ':'))
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, expires_at, tag, size, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, payload, now + ttl, tag, len(payload), now),
+        )
+        self._writes += 1
+        if self._writes % 50 == 0:
+            self._evict()
+
+    def _evict(self) -> None:
+        conn = self._connect()
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM invalidations WHERE invalidated_at <= ?", (time.time() - self.INVALIDATION_RETENTION,)
+        )
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used rows until we are back under the budget
+        excess = total - self.max_bytes
+        freed = 0
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+        self.stats['evictions'] += len(doomed)
+
+    def delete(self, key: str) -> None:
+        self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def invalidate_tag(self, tag: str) -> int:
+        conn = self._connect()
+        conn.execute("INSERT INTO invalidations (tag, invalidated_at) VALUES (?, ?)", (tag, time.time()))
+        return conn.execute("DELETE FROM entries WHERE tag = ?", (tag,)).rowcount
+
+    def clear(self) -> None:
+        conn = self._connect()
+        conn.execute("INSERT INTO invalidations (tag, invalidated_at) VALUES (NULL, ?)", (time.time(),))
+        conn.execute("DELETE FROM entries")
+
+    def invalidations(self, after: int) -> Tuple[int, List[Optional[str]]]:
+        """
+        Tags invalidated since invalidation id ``after`` (None for a clear)
+        and the id to pass next time.
+        """
+        rows = self._connect().execute(
+            "SELECT id, tag FROM invalidations WHERE id > ? ORDER BY id", (after,)
+        ).fetchall()
+        return (rows[-1][0] if rows else after), [tag for _, tag in rows]
+
+
+class TieredCache:
+    """
+    In-process LRU in front of an optional shared tier.
+    Values found in the shared tier are promoted to memory for the time they
+    have left, so each worker only reads SQLite once per entry. Every
+    ``invalidation_interval`` seconds the invalidations logged by the other
+    workers are applied to the memory tier.
+    """
+
+    def __init__(
+            self,
+            memory: MemoryCache,
+            shared: Optional[SQLiteCache] = None,
+            invalidation_interval: float = 1.0,
+    ):
+        self.memory = memory
+        self.shared = shared
+        self.invalidation_interval = invalidation_interval
+        self._invalidation_id = shared.invalidations(-1)[0] if shared is not None else 0
+        self._invalidations_checked = time.monotonic()
+        self._invalidation_lock = threading.Lock()
+
+    def _apply_invalidations(self) -> None:
+        now = time.monotonic()
+        if now - self._invalidations_checked < self.invalidation_interval:
+            return
+        with self._invalidation_lock:
+            if now - self._invalidations_checked < self.invalidation_interval:
+                return
+            self._invalidations_checked = now
+            self._invalidation_id, tags = self.shared.invalidations(self._invalidation_id)
+        for tag in tags:
+            if tag is None:
+                self.memory.clear()
+            else:
+                self.memory.invalidate_tag(tag)
+
+    @property
+    def tiers(self) -> Iterable[Any]:
+        return [tier for tier in (self.memory, self.shared) if tier is not None]
+
+    def get(self, key: str) -> Any:
+        if self.shared is not None:
+            self._apply_invalidations()
+        value = self.memory.get(key)
+        if value is not MISSING or self.shared is None:
+            return value
+        entry = self.shared.lookup(key)
+        if entry is MISSING:
+            return MISSING
+        value, ttl, tag = entry
+        self.memory.set(key, value, ttl, tag)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float, tag: Optional[str] = None) -> None:
+        self.memory.set(key, value, ttl, tag)
+        if self.shared is not None:
+            self.shared.set(key, value, ttl, tag)
+
+    def delete(self, key: str) -> None:
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def invalidate_tag(self, tag: str) -> int:
+        return sum(tier.invalidate_tag(tag) for tier in self.tiers)
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        stats = {'memory': dict(self.memory.stats)}
+        if self.shared is not None:
+            stats['shared'] = dict(self.shared.stats)
+        return stats
+
+
+_default_cache: Optional[TieredCache] = None
+_validator_cache: Optional[TieredCache] = None
+_default_lock = threading.Lock()
+
+
+def _build_cache(path: str, max_entries: int, max_bytes: int) -> TieredCache:
+    shared = SQLiteCache(path, max_bytes) if path else None
+    return TieredCache(MemoryCache(max_entries), shared, config.CACHE_INVALIDATION_INTERVAL)
+
+
+def get_cache() -> TieredCache:
+    """
+    Return the process-wide cache built from ``core.config``.
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = _build_cache(config.CACHE_PATH, config.CACHE_MAX_ENTRIES, config.CACHE_MAX_BYTES)
+        return _default_cache
+
+
+def get_validator_cache() -> TieredCache:
+    """
+    Return the process-wide cache of upstream validators, with its own budget.
+    """
+    global _validator_cache
+    with _default_lock:
+        if _validator_cache is None:
+            _validator_cache = _build_cache(
+                config.CACHE_VALIDATOR_PATH, config.CACHE_VALIDATOR_MAX_ENTRIES, config.CACHE_VALIDATOR_MAX_BYTES,
+            )
+        return _validator_cache
+
+
+def set_cache(cache: TieredCache) -> None:
+    """
+    Replace the process-wide cache, e.g. with a memory-only one.
+    """
+    global _default_cache
+    with _default_lock:
+        _default_cache = cache
+
+
+def anime_tag(anime_id: Any) -> str:
+    return f"anime:{anime_id}"
+
+
+class DegradedResult(Exception):
+    """
+    Raised by a cached method to return a usable but incomplete value, e.g.
+    an episode list where some servers failed. It is cached with the
+    negative TTL so the missing parts are retried soon.
+    """
+
+    def __init__(self, value: Any):
+        super().__init__("degraded result")
+        self.value = value
+
+
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+_refresh_tasks = set()
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="jkanime-refresh")
+
+
+def _claim_refresh(cache_key: str) -> bool:
+    with _refreshing_lock:
+        if cache_key in _refreshing:
+            return False
+        _refreshing.add(cache_key)
+        return True
+
+
+def _release_refresh(cache_key: str) -> None:
+    with _refreshing_lock:
+        _refreshing.discard(cache_key)
+
+
+def cached(
+        endpoint: str,
+        key: Optional[Callable[..., Tuple]] = None,
+        tag: Optional[Callable[..., Optional[str]]] = None,
+        encode: Optional[Callable[[Any], Any]] = None,
+        decode: Optional[Callable[[Any], Any]] = None,
+        fallback: Any = MISSING,
+):
+    """
+    Cache a scraper method in ``self._cache`` with the endpoint's TTL.
+    Works on both sync and async methods. ``key`` maps the call arguments to
+    the cache key (every argument of the signature by default, however it
+    was passed), ``tag`` groups
+    entries for invalidation and ``encode``/``decode`` convert results to
+    and from JSON-friendly values.
+
+    Entries are stored as envelopes so failures are told apart from real
+    results. When the method raises and a ``fallback`` factory is given the
+    error is cached for ``CACHE_NEGATIVE_TTL`` seconds and the fallback is
+    returned; callers that need the error pass ``strict=True``, which also
+    raises ``DegradedResult`` for incomplete values. Entries
+    past their TTL are still served for ``CACHE_STALE_TTL`` seconds while a
+    single background refresh replaces them (stale-while-revalidate).
+    Concurrent misses for the same key are coalesced into one call.
+    ``use_cache=False`` calls the method directly, neither reading nor
+    storing an entry, and raises its errors (crawlers that retry on their own).
+    The wrapper's ``cache_key(*args)`` gives the key of a call, for dropping
+    a single entry.
+    """
+    def store(self, cache_key: str, ok: bool, value: Any, args: Tuple, kwargs: Dict, degraded: bool = False) -> Dict:
+        now = time.time()
+        if not ok:
+            envelope = {'ok': False, 'v': value}
+            ttl = expires = config.CACHE_NEGATIVE_TTL
+        else:
+            envelope = {'ok': True, 'v': encode(value) if encode else value}
+            if degraded:
+                envelope['partial'] = True
+                ttl = expires = config.CACHE_NEGATIVE_TTL
+            else:
+                ttl = config.CACHE_TTLS[endpoint]
+                expires = ttl + config.CACHE_STALE_TTL
+        envelope['fresh'] = now + ttl
+        envelope['stale'] = now + expires
+        self._cache.set(cache_key, envelope, expires, tag(*args, **kwargs) if tag else None)
+        return envelope
+
+    def keep_stale(self, cache_key: str, envelope: Dict, args: Tuple, kwargs: Dict) -> None:
+        # The refresh failed: keep serving the stale value and retry after the negative TTL
+        now = time.time()
+        if envelope['stale'] <= now:
+            return
+        envelope = dict(envelope, fresh=now + config.CACHE_NEGATIVE_TTL)
+        self._cache.set(cache_key, envelope, envelope['stale'] - now, tag(*args, **kwargs) if tag else None)
+
+    def failure(message: str, strict: bool) -> Any:
+        if strict or fallback is MISSING:
+            raise UpstreamError(message)
+        return fallback()
+
+    def unwrap(envelope: Dict, strict: bool) -> Any:
+        if not envelope['ok']:
+            return failure(envelope['v'], strict)
+        value = decode(envelope['v']) if decode else envelope['v']
+        if strict and envelope.get('partial'):
+            raise DegradedResult(value)
+        return value
+
+    def count(envelope: Any) -> None:
+        if envelope is MISSING:
+            result = 'miss'
+        elif not envelope['ok']:
+            result = 'negative'
+        else:
+            result = 'hit' if envelope['fresh'] > time.time() else 'stale'
+        SCRAPE_CACHE.inc(endpoint=endpoint, result=result)
+
+    def decorator(func):
+        name = func.__name__
+        signature = inspect.signature(func)
+
+        def make_key(args: Tuple, kwargs: Dict) -> str:
+            if key:
+                parts = key(*args, **kwargs)
+            else:
+                # Bind so that f(1, page=2) and f(1, 2) share a key and keyword calls are told apart
+                bound = signature.bind(None, *args, **kwargs)
+                bound.apply_defaults()
+                parts = []
+                for param in list(signature.parameters.values())[1:]:
+                    value = bound.arguments[param.name]
+                    if param.kind is param.VAR_POSITIONAL:
+                        parts.extend(value)
+                    elif param.kind is param.VAR_KEYWORD:
+                        if value:
+                            parts.append(dict(sorted(value.items())))
+                    else:
+                        parts.append(value)
+            return f"{endpoint}:{ENTRY_FORMAT}:{json.dumps(parts, separators=(',', ':'), default=str)}"
+
+        if inspect.iscoroutinefunction(func):
+            async def load(self, cache_key: str, args: Tuple, kwargs: Dict) -> Dict:
+                try:
+                    result = await func(self, *args, **kwargs)
+                except DegradedResult as degraded:
+                    return store(self, cache_key, True, degraded.value, args, kwargs, degraded=True)
+                except Exception as e:
+                    logger.warning("Error in %s: %s", name, e)
+                    if fallback is MISSING:
+                        raise
+                    return store(self, cache_key, False, str(e), args, kwargs)
+                return store(self, cache_key, True, result, args, kwargs)
+
+            async def refresh(self, cache_key: str, envelope: Dict, args: Tuple, kwargs: Dict) -> None:
+                try:
+                    result = await func(self, *args, **kwargs)
+                    store(self, cache_key, True, result, args, kwargs)
+                except DegradedResult:
+                    keep_stale(self, cache_key, envelope, args, kwargs)
+                except Exception as e:
+                    logger.warning("Error refreshing %s: %s", name, e)
+                    keep_stale(self, cache_key, envelope, args, kwargs)
+                finally:
+                    _release_refresh(cache_key)
+
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, strict: bool = False, use_cache: bool = True, **kwargs):
+                if not use_cache:
+                    return await func(self, *args, **kwargs)
+                cache_key = make_key(args, kwargs)
+                envelope = self._cache.get(cache_key)
+                count(envelope)
+                if envelope is MISSING:
+                    # Concurrent misses for the same key share one upstream fetch
+                    envelope = await flights.do_async(
+                        endpoint, cache_key, lambda: load(self, cache_key, args, kwargs)
+                    )
+                    return unwrap(envelope, strict)
+                if envelope['ok'] and envelope['fresh'] <= time.time() and _claim_refresh(cache_key):
+                    task = asyncio.get_running_loop().create_task(refresh(self, cache_key, envelope, args, kwargs))
+                    _refresh_tasks.add(task)
+                    task.add_done_callback(_refresh_tasks.discard)
+                return unwrap(envelope, strict)
+            async_wrapper.cache_key = lambda *args, **kwargs: make_key(args, kwargs)
+            return async_wrapper
+
+        def load_sync(self, cache_key: str, args: Tuple, kwargs: Dict) -> Dict:
+            try:
+                result = func(self, *args, **kwargs)
+            except DegradedResult as degraded:
+                return store(self, cache_key, True, degraded.value, args, kwargs, degraded=True)
+            except Exception as e:
+                logger.warning("Error in %s: %s", name, e)
+                if fallback is MISSING:
+                    raise
+                return store(self, cache_key, False, str(e), args, kwargs)
+            return store(self, cache_key, True, result, args, kwargs)
+
+        def refresh_sync(self, cache_key: str, envelope: Dict, args: Tuple, kwargs: Dict) -> None:
+            try:
+                result = func(self, *args, **kwargs)
+                store(self, cache_key, True, result, args, kwargs)
+            except DegradedResult:
+                keep_stale(self, cache_key, envelope, args, kwargs)
+            except Exception as e:
+                logger.warning("Error refreshing %s: %s", name, e)
+                keep_stale(self, cache_key, envelope, args, kwargs)
+            finally:
+                _release_refresh(cache_key)
+
+        @functools.wraps(func)
+        def wrapper(self, *args, strict: bool = False, use_cache: bool = True, **kwargs):
+            if not use_cache:
+                return func(self, *args, **kwargs)
+            cache_key = make_key(args, kwargs)
+            envelope = self._cache.get(cache_key)
+            count(envelope)
+            if envelope is MISSING:
+                envelope = flights.do(endpoint, cache_key, lambda: load_sync(self, cache_key, args, kwargs))
+                return unwrap(envelope, strict)
+            if envelope['ok'] and envelope['fresh'] <= time.time() and _claim_refresh(cache_key):
+                _refresh_executor.submit(refresh_sync, self, cache_key, envelope, args, kwargs)
+            return unwrap(envelope, strict)
+        wrapper.cache_key = lambda *args, **kwargs: make_key(args, kwargs)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,129 @@
+"""
+Cloudflare clearance shared by the workers of a node.
+
+The clearance cookies and the user agent they were issued to are saved in a
+small JSON file, so a new or restarted worker starts with a solved
+challenge instead of solving it again.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to atomic replace without a lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Cookies that carry the clearance, the rest of the jar is not worth sharing
+CLEARANCE_COOKIES = ('cf_clearance', '__cf_bm', 'cf_chl_rc_m')
+
+
+class ClearanceStore:
+    """
+    JSON file holding ``{'user_agent', 'cookies', 'saved_at'}``.
+    Writers take an exclusive lock on a side file and replace the store
+    atomically, readers never see a half-written file. The lock is
+    reentrant within a thread, so ``save`` works inside ``solving``.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        depth = getattr(self._local, 'depth', 0)
+        if depth or fcntl is None:
+            self._local.depth = depth + 1
+            try:
+                yield
+            finally:
+                self._local.depth = depth
+            return
+        with open(f"{self.path}.lock", 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._local.depth = 1
+            try:
+                yield
+            finally:
+                self._local.depth = 0
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def load(self) -> Optional[Dict]:
+        """
+        The saved clearance, or None when there is none or it has expired.
+        """
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable clearance store %s: %s", self.path, e)
+            return None
+        now = time.time()
+        data['cookies'] = [c for c in data.get('cookies', []) if not c.get('expires') or c['expires'] > now]
+        if not data['cookies']:
+            return None
+        return data
+
+    def save(self, user_agent: str, cookies: List[Dict]) -> float:
+        """
+        Replace the stored clearance, returns its ``saved_at``.
+        """
+        data = {'user_agent': user_agent, 'cookies': cookies, 'saved_at': time.time()}
+        if not self.path:
+            return data['saved_at']
+        with self._locked():
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        return data['saved_at']
+
+    @contextmanager
+    def solving(self) -> Iterator[None]:
+        """
+        Hold the store lock while a challenge is solved, so the other
+        workers wait for the result instead of solving it too.
+        """
+        if not self.path:
+            yield
+            return
+        with self._locked():
+            yield
+
+
+def clearance_cookies(jar) -> List[Dict]:
+    """
+    The clearance cookies of a requests cookie jar as JSON-friendly dicts.
+    """
+    return [
+        {
+            'name': cookie.name,
+            'value': cookie.value,
+            'domain': cookie.domain,
+            'path': cookie.path,
+            'expires': cookie.expires,
+        }
+        for cookie in jar
+        if cookie.name in CLEARANCE_COOKIES
+    ]
+
+
+def expires_at(cookies: List[Dict]) -> Optional[float]:
+    """
+    When the first cookie with an expiry runs out, None if none expires.
+    """
+    expiries = [c['expires'] for c in cookies if c.get('expires')]
+    return min(expiries) if expiries else None
@@ -0,0 +1,445 @@
+"""
+Targeted extraction of the data the scraper needs from jkanime pages.
+
+Every extractor first tries a fast path (a bounded scan of the raw HTML or
+lxml XPath queries that skip building a BeautifulSoup tree) and falls back
+to the original full ``BeautifulSoup`` parse when the fast path fails.
+"""
+
+import json
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+import lxml.etree
+import lxml.html
+from bs4 import BeautifulSoup
+from utils.metrics import PARSE_LATENCY, registry
+
+SERVERS_RE = re.compile(r"var servers = (\[.*?\]);", re.DOTALL)
+SERVERNAME_RE = re.compile(r"var servername = \"([^\"]+)\";")
+
+VIDEO_MARKER = "var video = [];"
+ANIMES_MARKER = "var animes ="
+
+class FastPathError(Exception):
+    """
+    The fast path could not make sense of the page, use the full parse
+    """
+
+
+def _script_containing(html: str, marker: str) -> Optional[str]:
+    """
+    Return the contents of the script tag that contains ``marker``,
+    or None if the marker is not on the page.
+    """
+    idx = html.find(marker)
+    if idx == -1:
+        return None
+    start = html.rfind('<script', 0, idx)
+    end = html.find('</script>', idx)
+    if start == -1 or end == -1:
+        raise FastPathError(f"no script around {marker!r}")
+    start = html.find('>', start, idx)
+    if start == -1:
+        raise FastPathError(f"unterminated script tag around {marker!r}")
+    return html[start + 1:end]
+
+
+def _with_fallback(fast, full, html: str):
+    if not registry.enabled:
+        try:
+            return fast(html)
+        except (FastPathError, ValueError, AttributeError, lxml.etree.LxmlError):
+            return full(html)
+
+    start = time.perf_counter()
+    path = 'fast'
+    try:
+        result = fast(html)
+    except (FastPathError, ValueError, AttributeError, lxml.etree.LxmlError):
+        path = 'full'
+        result = full(html)
+    PARSE_LATENCY.observe(time.perf_counter() - start, extractor=fast.__name__[len('fast_'):], path=path)
+    return result
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+ITEM_XPATH = f"//div[{_has_class('anime__item')}]"
+PAGINATION_XPATH = f"//div[{_has_class('anime__pagination')}]"
+DETAILS_XPATH = f"//div[{_has_class('anime__details__content')}]"
+SCHEDULE_DAY_XPATH = f"//div[{_has_class('semana')}]"
+
+
+def _first(element, xpath: str):
+    found = element.xpath(xpath)
+    return found[0] if found else None
+
+
+# Episode page: var servers = [...]
+
+def _servers_from_script(content: str) -> List[Dict]:
+    servers_match = SERVERS_RE.search(content)
+    if not servers_match:
+        return []
+    try:
+        return json.loads(servers_match.group(1))
+    except json.JSONDecodeError:
+        return []
+
+
+def fast_servers(html: str) -> List[Dict]:
+    content = _script_containing(html, VIDEO_MARKER)
+    if content is None:
+        return []
+    servers_match = SERVERS_RE.search(content)
+    if not servers_match:
+        return []
+    # A decode error here means the scan cut the array short, let the full parse decide
+    return json.loads(servers_match.group(1))
+
+
+def full_servers(html: str) -> List[Dict]:
+    soup = BeautifulSoup(html, "lxml")
+    target_script = soup.find("script", string=lambda s: s and VIDEO_MARKER in s)
+    if not target_script:
+        return []
+    return _servers_from_script(target_script.string or target_script.text)
+
+
+def extract_servers(html: str) -> List[Dict]:
+    """
+    Raw ``var servers`` entries of an episode page, [] if there are none.
+    """
+    return _with_fallback(fast_servers, full_servers, html)
+
+
+# Player page: var servername and the video iframe
+
+def _player_from_soup(soup: BeautifulSoup) -> Tuple[Optional[str], Optional[str]]:
+    server_name = None
+    script_tag = soup.find('script')
+    if script_tag:
+        script_content = script_tag.string or script_tag.text
+        match = SERVERNAME_RE.search(script_content)
+        if match:
+            server_name = match.group(1)
+
+    video_url = None
+    iframe = soup.find('iframe')
+    if iframe and iframe.has_attr('src'):
+        video_url = iframe['src'].strip()
+    return server_name, video_url
+
+
+def fast_player(html: str) -> Tuple[Optional[str], Optional[str]]:
+    root = lxml.html.fromstring(html)
+    server_name = None
+    script_tag = _first(root, "(//script)[1]")
+    if script_tag is not None:
+        match = SERVERNAME_RE.search(script_tag.text or '')
+        if match:
+            server_name = match.group(1)
+
+    video_url = None
+    iframe = _first(root, "(//iframe)[1]")
+    if iframe is not None and iframe.get('src') is not None:
+        video_url = iframe.get('src').strip()
+    return server_name, video_url
+
+
+def full_player(html: str) -> Tuple[Optional[str], Optional[str]]:
+    return _player_from_soup(BeautifulSoup(html, "lxml"))
+
+
+def extract_player(html: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    ``(servername, iframe src)`` of a jkplayer page.
+    """
+    return _with_fallback(fast_player, full_player, html)
+
+
+# Directory page: var animes = [...]
+
+def _animes_from_script(script_content: str) -> List[Dict]:
+    start_idx = script_content.find(ANIMES_MARKER) + len(ANIMES_MARKER)
+    end_idx = script_content.find("var mode =")
+    if end_idx == -1:
+        end_idx = script_content.find("function anime_status")
+
+    animes_json = script_content[start_idx:end_idx].strip()
+    if animes_json.endswith(";"):
+        animes_json = animes_json[:-1]
+    return json.loads(animes_json)
+
+
+def fast_animes(html: str) -> List[Dict]:
+    content = _script_containing(html, ANIMES_MARKER)
+    if content is None:
+        return []
+    return _animes_from_script(content)
+
+
+def full_animes(html: str) -> List[Dict]:
+    soup = BeautifulSoup(html, "lxml")
+    target_script = soup.find("script", string=lambda s: s and ANIMES_MARKER in s)
+    if not target_script:
+        return []
+    return _animes_from_script(target_script.string)
+
+
+def extract_animes(html: str) -> List[Dict]:
+    """
+    Titles of a directory page.
+    """
+    return _with_fallback(fast_animes, full_animes, html)
+
+
+# Search and listing pages: div.anime__item
+
+def _anime_item(item) -> Dict:
+    anime = {'id': None, 'title': None, 'image': None, 'synopsis': None, 'type': None}
+    title_id = item.find('h5')
+    if title_id:
+        a_tag = title_id.find('a')
+        if a_tag and a_tag.get('href'):
+            anime['id'] = a_tag.get('href').strip('/').split('/')[-1]
+    title_elem = item.find('div', class_='title')
+    if title_elem:
+        anime['title'] = title_elem.text.strip()
+    img_elem = item.find('div', class_="anime__item__pic")
+    if img_elem:
+        anime['image'] = img_elem.get('data-setbg')
+    p_elem = item.find('p')
+    if p_elem:
+        anime['synopsis'] = p_elem.text.strip()
+    # Type (Anime, Movie, OVA)
+    li_elem = item.find('li', class_="anime")
+    if li_elem:
+        anime['type'] = li_elem.text.strip()
+    return anime
+
+
+def fast_anime_items(html: str) -> List[Dict]:
+    if 'anime__item' not in html:
+        return []
+    results = []
+    for item in lxml.html.fromstring(html).xpath(ITEM_XPATH):
+        anime = {'id': None, 'title': None, 'image': None, 'synopsis': None, 'type': None}
+        h5 = _first(item, ".//h5")
+        if h5 is not None:
+            a_tag = _first(h5, ".//a")
+            if a_tag is not None and a_tag.get('href'):
+                anime['id'] = a_tag.get('href').strip('/').split('/')[-1]
+        title_elem = _first(item, f".//div[{_has_class('title')}]")
+        if title_elem is not None:
+            anime['title'] = title_elem.text_content().strip()
+        img_elem = _first(item, f".//div[{_has_class('anime__item__pic')}]")
+        if img_elem is not None:
+            anime['image'] = img_elem.get('data-setbg')
+        p_elem = _first(item, ".//p")
+        if p_elem is not None:
+            anime['synopsis'] = p_elem.text_content().strip()
+        li_elem = _first(item, f".//li[{_has_class('anime')}]")
+        if li_elem is not None:
+            anime['type'] = li_elem.text_content().strip()
+        results.append(anime)
+    return results
+
+
+def full_anime_items(html: str) -> List[Dict]:
+    soup = BeautifulSoup(html, "lxml")
+    return [_anime_item(item) for item in soup.find_all('div', class_='anime__item')]
+
+
+def extract_anime_items(html: str) -> List[Dict]:
+    """
+    ``anime__item`` cards of a search or listing page as dictionaries.
+    """
+    return _with_fallback(fast_anime_items, full_anime_items, html)
+
+
+# Anime page: div.anime__pagination a.numbers
+
+def _pagination_from_soup(soup: BeautifulSoup) -> Optional[List[Tuple[str, str]]]:
+    anime_pagination = soup.find("div", class_='anime__pagination')
+    if not anime_pagination:
+        return None
+    return [
+        (item.get('href'), item.text.strip())
+        for item in anime_pagination.find_all("a", class_="numbers")
+    ]
+
+
+def fast_pagination(html: str) -> Optional[List[Tuple[str, str]]]:
+    if 'anime__pagination' not in html:
+        return None
+    anime_pagination = _first(lxml.html.fromstring(html), PAGINATION_XPATH)
+    if anime_pagination is None:
+        return None
+    return [
+        (item.get('href'), item.text_content().strip())
+        for item in anime_pagination.xpath(f".//a[{_has_class('numbers')}]")
+    ]
+
+
+def full_pagination(html: str) -> Optional[List[Tuple[str, str]]]:
+    return _pagination_from_soup(BeautifulSoup(html, "lxml"))
+
+
+def extract_pagination(html: str) -> Optional[List[Tuple[str, str]]]:
+    """
+    ``(href, text)`` of the episode range links, None without pagination.
+    """
+    return _with_fallback(fast_pagination, full_pagination, html)
+
+
+# Anime page: div.anime__details__content
+
+# Widget labels kept in the anime details, by their lowercased label
+DETAIL_WIDGETS = {'tipo': 'type', 'estado': 'status'}
+
+
+def _empty_details() -> Dict:
+    return {'title': None, 'alt_title': None, 'image': None, 'synopsis': None, 'type': None, 'status': None}
+
+
+def _widget_field(label: str) -> Optional[str]:
+    return DETAIL_WIDGETS.get(label.strip().rstrip(':').lower())
+
+
+def fast_details(html: str) -> Optional[Dict]:
+    if 'anime__details__content' not in html:
+        return None
+    content = _first(lxml.html.fromstring(html), DETAILS_XPATH)
+    if content is None:
+        return None
+    details = _empty_details()
+    title = _first(content, f".//div[{_has_class('anime__details__title')}]")
+    if title is not None:
+        h3, span = _first(title, ".//h3"), _first(title, ".//span")
+        details['title'] = h3.text_content().strip() if h3 is not None else None
+        details['alt_title'] = span.text_content().strip() if span is not None else None
+    pic = _first(content, f".//div[{_has_class('anime__details__pic')}]")
+    if pic is not None:
+        details['image'] = pic.get('data-setbg')
+    synopsis = _first(content, f".//p[{_has_class('sinopsis')}]")
+    if synopsis is not None:
+        details['synopsis'] = synopsis.text_content().strip()
+    for li in content.xpath(f".//div[{_has_class('anime__details__widget')}]//li"):
+        label = _first(li, ".//span")
+        field = _widget_field(label.text_content()) if label is not None else None
+        if field:
+            details[field] = li.text_content().replace(label.text_content(), '', 1).strip()
+    return details
+
+
+def full_details(html: str) -> Optional[Dict]:
+    content = BeautifulSoup(html, "lxml").find('div', class_='anime__details__content')
+    if not content:
+        return None
+    details = _empty_details()
+    title = content.find('div', class_='anime__details__title')
+    if title:
+        h3, span = title.find('h3'), title.find('span')
+        details['title'] = h3.text.strip() if h3 else None
+        details['alt_title'] = span.text.strip() if span else None
+    pic = content.find('div', class_='anime__details__pic')
+    if pic:
+        details['image'] = pic.get('data-setbg')
+    synopsis = content.find('p', class_='sinopsis')
+    if synopsis:
+        details['synopsis'] = synopsis.text.strip()
+    widget = content.find('div', class_='anime__details__widget')
+    for li in widget.find_all('li') if widget else []:
+        label = li.find('span')
+        field = _widget_field(label.text) if label else None
+        if field:
+            details[field] = li.text.replace(label.text, '', 1).strip()
+    return details
+
+
+def extract_details(html: str) -> Optional[Dict]:
+    """
+    Title fields of an anime page, None when the page has no details block.
+    """
+    return _with_fallback(fast_details, full_details, html)
+
+
+# Schedule page: div.semana > h2 day, div.box per airing title
+
+def _href_id(href: Optional[str]) -> Optional[str]:
+    return href.strip('/').split('/')[-1] if href else None
+
+
+def _last_episode(href: Optional[str]) -> Optional[int]:
+    # https://jkanime.net/<anime_id>/<episode>/
+    last = _href_id(href)
+    return int(last) if last and last.isdigit() else None
+
+
+def fast_schedule(html: str) -> List[Dict]:
+    if 'semana' not in html:
+        return []
+    results = []
+    for day in lxml.html.fromstring(html).xpath(SCHEDULE_DAY_XPATH):
+        h2 = _first(day, ".//h2")
+        day_name = h2.text_content().strip() if h2 is not None else None
+        for box in day.xpath(f".//div[{_has_class('box')}]"):
+            link = _first(box, f".//div[{_has_class('boxx')}]//a")
+            if link is None:
+                continue
+            title, img = _first(link, ".//h3"), _first(link, ".//img")
+            last = _first(box, f".//div[{_has_class('last')}]//a")
+            results.append({
+                'day': day_name,
+                'id': _href_id(link.get('href')),
+                'title': title.text_content().strip() if title is not None else None,
+                'image': img.get('src') if img is not None else None,
+                'episode': _last_episode(last.get('href')) if last is not None else None,
+            })
+    return results
+
+
+def full_schedule(html: str) -> List[Dict]:
+    results = []
+    for day in BeautifulSoup(html, "lxml").find_all('div', class_='semana'):
+        h2 = day.find('h2')
+        day_name = h2.text.strip() if h2 else None
+        for box in day.find_all('div', class_='box'):
+            boxx = box.find('div', class_='boxx')
+            link = boxx.find('a') if boxx else None
+            if not link:
+                continue
+            title, img = link.find('h3'), link.find('img')
+            last = box.find('div', class_='last')
+            last = last.find('a') if last else None
+            results.append({
+                'day': day_name,
+                'id': _href_id(link.get('href')),
+                'title': title.text.strip() if title else None,
+                'image': img.get('src') if img else None,
+                'episode': _last_episode(last.get('href')) if last else None,
+            })
+    return results
+
+
+def extract_schedule(html: str) -> List[Dict]:
+    """
+    Airing titles of the schedule page with their weekday and newest episode.
+    """
+    return _with_fallback(fast_schedule, full_schedule, html)
+
+
+# Pairs checked by benchmarks/parity.py
+EXTRACTORS = {
+    'servers': (fast_servers, full_servers),
+    'player': (fast_player, full_player),
+    'animes': (fast_animes, full_animes),
+    'anime_items': (fast_anime_items, full_anime_items),
+    'pagination': (fast_pagination, full_pagination),
+    'details': (fast_details, full_details),
+    'schedule': (fast_schedule, full_schedule),
+}
@@ -0,0 +1,132 @@
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from core import config
+
+
+class MirrorStats:
+    __slots__ = ('requests', 'errors', 'consecutive_failures', 'latency', 'deviation', 'open_until', 'aliases')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        # Exponentially weighted mean and mean deviation of the latency, in seconds
+        self.latency: Optional[float] = None
+        self.deviation = 0.0
+        self.open_until = 0.0
+        self.aliases = set()
+
+
+class MirrorHealth:
+    """
+    Rolling latency and error stats per video mirror with a circuit breaker.
+    A mirror that fails ``failure_threshold`` times in a row is skipped for
+    ``cooldown`` seconds, after which one trial request is let through.
+    """
+
+    def __init__(
+            self,
+            failure_threshold: int = config.MIRROR_FAILURE_THRESHOLD,
+            cooldown: float = config.MIRROR_COOLDOWN,
+            alpha: float = 0.2,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.alpha = alpha
+        self._mirrors: Dict[str, MirrorStats] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, mirror: str) -> MirrorStats:
+        stats = self._mirrors.get(mirror)
+        if stats is None:
+            stats = self._mirrors[mirror] = MirrorStats()
+        return stats
+
+    def allow(self, mirror: str) -> bool:
+        """
+        False while the mirror's circuit is open.
+        """
+        now = time.time()
+        with self._lock:
+            stats = self._mirrors.get(mirror)
+            if stats is None or stats.consecutive_failures < self.failure_threshold:
+                return True
+            if stats.open_until > now:
+                return False
+            # Half-open: let this one request probe the mirror, hold the rest
+            stats.open_until = now + self.cooldown
+            return True
+
+    def is_open(self, mirror: str) -> bool:
+        """
+        True while the mirror's circuit is open, without taking a half-open probe.
+        """
+        with self._lock:
+            stats = self._mirrors.get(mirror)
+            return stats is not None and stats.open_until > time.time()
+
+    def record(self, mirror: str, latency: float, ok: bool, alias: Optional[str] = None) -> None:
+        with self._lock:
+            stats = self._get(mirror)
+            stats.requests += 1
+            if alias:
+                stats.aliases.add(alias)
+            if ok:
+                stats.consecutive_failures = 0
+                stats.open_until = 0.0
+                if stats.latency is None:
+                    stats.latency = latency
+                else:
+                    stats.deviation += self.alpha * (abs(latency - stats.latency) - stats.deviation)
+                    stats.latency += self.alpha * (latency - stats.latency)
+                return
+            stats.errors += 1
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures >= self.failure_threshold:
+                stats.open_until = time.time() + self.cooldown
+
+    def hedge_delay(self, mirror: str) -> float:
+        """
+        How long to wait before sending a duplicate request: roughly the
+        slow tail of the mirror's latency, clamped to the configured range.
+        """
+        with self._lock:
+            stats = self._mirrors.get(mirror)
+            if stats is None or stats.latency is None:
+                return config.HEDGE_MAX_DELAY
+            tail = stats.latency + 4 * stats.deviation
+        return min(config.HEDGE_MAX_DELAY, max(config.HEDGE_MIN_DELAY, tail))
+
+    def score(self, mirror: Optional[str]) -> tuple:
+        """
+        Sort key, healthy and fast mirrors first, unknown ones after them.
+        """
+        with self._lock:
+            stats = self._mirrors.get(mirror) if mirror else None
+            if stats is None or stats.latency is None:
+                return (stats is not None and stats.open_until > time.time(), 1.0, float('inf'))
+            error_rate = stats.errors / stats.requests if stats.requests else 0.0
+            return (stats.open_until > time.time(), round(error_rate, 1), stats.latency)
+
+    def order(self, servers: Iterable[Tuple[str, Optional[Dict]]]) -> List[Dict]:
+        """
+        Resolved servers of ``(mirror, server)`` pairs sorted
+        fastest-healthy-first, unresolved ones dropped.
+        """
+        resolved = [(self.score(mirror), index, server) for index, (mirror, server) in enumerate(servers) if server]
+        return [server for _, _, server in sorted(resolved, key=lambda item: item[:2])]
+
+    def snapshot(self) -> Dict[str, Dict]:
+        now = time.time()
+        with self._lock:
+            return {
+                mirror: {
+                    'requests': stats.requests,
+                    'errors': stats.errors,
+                    'latency_ms': round(stats.latency * 1000, 1) if stats.latency is not None else None,
+                    'circuit_open': stats.open_until > now,
+                    'aliases': sorted(stats.aliases),
+                }
+                for mirror, stats in self._mirrors.items()
+            }
@@ -0,0 +1,68 @@
+"""
+HTTP validators both ways.
+
+Upstream: the ETag / Last-Modified of a page are kept with its parse result,
+so the next fetch is conditional and a 304 skips the download and the parse.
+Downstream: API responses get a strong ETag from their body, conditional GETs
+are answered with 304 and every resource sets its own Cache-Control.
+"""
+
+import hashlib
+from typing import Any, Dict, Mapping, Optional
+from flask import Request, Response
+
+# Bumped when the stored validator layout changes
+VALIDATOR_FORMAT = 1
+
+
+def validator_key(url: str) -> str:
+    return f"validators:{VALIDATOR_FORMAT}:{url}"
+
+
+def response_validators(headers: Mapping) -> Optional[Dict[str, str]]:
+    """
+    The validators of an upstream response, None when it has neither.
+    """
+    validators = {}
+    if headers.get('ETag'):
+        validators['etag'] = headers['ETag']
+    if headers.get('Last-Modified'):
+        validators['last_modified'] = headers['Last-Modified']
+    return validators or None
+
+
+def conditional_headers(stored: Any) -> Dict[str, str]:
+    """
+    Request headers revalidating a stored entry, empty without one.
+    """
+    headers = {}
+    if not isinstance(stored, dict):
+        return headers
+    if stored.get('etag'):
+        headers['If-None-Match'] = stored['etag']
+    if stored.get('last_modified'):
+        headers['If-Modified-Since'] = stored['last_modified']
+    return headers
+
+
+def cache_control(ttl: int, stale: int = 60) -> str:
+    """
+    Cache-Control for a resource whose data is cached ``ttl`` seconds here.
+    """
+    if ttl <= 0:
+        return 'no-cache'
+    return f"public, max-age={ttl}, stale-while-revalidate={stale}"
+
+
+def make_conditional(response: Response, request: Request, control: Optional[str]) -> Response:
+    """
+    Add a strong ETag from the body and Cache-Control to a successful GET
+    response, and turn it into a 304 when the client already has it.
+    Streamed responses and ones that set their own Cache-Control are left alone.
+    """
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200 or response.is_streamed:
+        return response
+    if control and 'Cache-Control' not in response.headers:
+        response.headers['Cache-Control'] = control
+    response.set_etag(hashlib.sha256(response.get_data()).hexdigest()[:32])
+    return response.make_conditional(request)
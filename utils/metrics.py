@@ -0,0 +1,247 @@
+"""
+Minimal Prometheus-style metrics.
+
+Counters, gauges and histograms keyed by label values, rendered in the
+Prometheus text format by ``registry.render()``. When metrics are disabled
+(``JKANIME_METRICS_ENABLED=0``, applied by ``create_app()``) every update
+returns right away, so the instrumentation left in the hot paths costs one
+attribute check.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds, from a cached lookup to a slow upstream page
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, registry: "Registry", name: str, help: str, labels: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        return tuple(str(labels.get(label, '')) for label in self.labels)
+
+    def _labels(self, key: Tuple) -> Dict[str, str]:
+        return dict(zip(self.labels, key))
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track(self, **labels) -> Iterator[None]:
+        """
+        Count the block as in progress while it runs.
+        """
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """
+        Observe how long the block takes, in seconds.
+        """
+        if not self.registry.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        with self._lock:
+            items = [(key, list(counts)) for key, counts in self._values.items()]
+        for key, counts in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                samples.append((f"{self.name}_bucket", dict(labels, le=le), cumulative))
+            samples.append((f"{self.name}_count", labels, cumulative))
+            samples.append((f"{self.name}_sum", labels, counts[-1]))
+        return samples
+
+
+class Registry:
+    """
+    Holds the metrics and the collectors that read existing counters
+    (cache tiers, single-flight) at scrape time.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: Dict[str, Tuple[str, str, str, Callable[[], List[Sample]]]] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric: Metric) -> Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(self, name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(self, name, help, labels))
+
+    def histogram(
+            self,
+            name: str,
+            help: str,
+            labels: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._add(Histogram(self, name, help, labels, buckets=buckets))
+
+    def collector(self, name: str, help: str, kind: str, collect: Callable[[], List[Sample]]) -> None:
+        """
+        Register a callable returning ``(name, labels, value)`` samples, read
+        on every render. Registering the same name again replaces it.
+        """
+        with self._lock:
+            self._collectors[name] = (name, help, kind, collect)
+
+    def render(self) -> str:
+        with self._lock:
+            families = [(m.name, m.help, m.kind, m.samples) for m in self._metrics.values()]
+            families += list(self._collectors.values())
+        lines = []
+        for name, help, kind, collect in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample, labels, value in collect():
+                lines.append(f"{sample}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+UPSTREAM_LATENCY = registry.histogram(
+    'jkanime_upstream_fetch_seconds', 'Upstream page fetch latency by page kind', ('kind',),
+)
+UPSTREAM_ERRORS = registry.counter(
+    'jkanime_upstream_errors_total', 'Failed upstream fetches by page kind', ('kind',),
+)
+UPSTREAM_NOT_MODIFIED = registry.counter(
+    'jkanime_upstream_not_modified_total', 'Upstream revalidations answered with 304 by page kind', ('kind',),
+)
+UPSTREAM_IN_FLIGHT = registry.gauge(
+    'jkanime_upstream_in_flight', 'Upstream fetches in progress',
+)
+PARSE_LATENCY = registry.histogram(
+    'jkanime_parse_seconds', 'HTML extraction time by extractor and path (fast or full)',
+    ('extractor', 'path'), buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+SCRAPE_CACHE = registry.counter(
+    'jkanime_scrape_cache_requests_total', 'Scrape cache lookups by endpoint and result', ('endpoint', 'result'),
+)
+HTTP_LATENCY = registry.histogram(
+    'jkanime_http_request_seconds', 'API response latency by endpoint', ('endpoint', 'method', 'status'),
+)
+HTTP_IN_FLIGHT = registry.gauge(
+    'jkanime_http_requests_in_flight', 'API requests in progress',
+)
+
+
+def url_kind(url: str, base_url: Optional[str] = None) -> str:
+    """
+    Bounded label for an upstream URL: the jkanime route it belongs to.
+    """
+    if base_url and not url.startswith(base_url):
+        return 'external'
+    path = url[len(base_url):] if base_url else url
+    parts = [part for part in path.split('?')[0].split('/') if part]
+    if not parts:
+        return 'home'
+    first = parts[0]
+    if first in ('jkplayer', 'buscar', 'directorio', 'horario', 'genero', 'letra', 'tipo'):
+        return {'jkplayer': 'player', 'buscar': 'search', 'directorio': 'directory', 'horario': 'schedule'}.get(first, first)
+    if len(parts) > 1 and parts[1].isdigit():
+        return 'episode'
+    return 'anime'
@@ -1,16 +1,51 @@
 import cloudscraper
-import re
-import json
 import aiohttp
 import asyncio
+import itertools
+import logging
 import time
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional, Type, Union
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+from typing import AsyncIterator, Callable, List, Dict, Mapping, Optional, Tuple, Type, TypeVar, Union
 from types import TracebackType
 from models.anime import Anime
 from models.episode import Episode
-from core.constants import BASE_URL, SEARCH_URL, DIRECTORY_URL
-from async_lru import alru_cache
+from core.constants import (
+    BASE_URL, DIRECTORY_URL, GENRE_URL, SCHEDULE_URL, SEARCH_BY_CHARACTER_URL, SEARCH_URL, TYPE_URL,
+)
+from core import config
+from utils.extract import (
+    extract_anime_items, extract_animes, extract_details, extract_pagination, extract_player,
+    extract_schedule, extract_servers,
+)
+from utils.concurrency import HostRateLimiter, bounded_gather
+from utils.health import MirrorHealth
+from utils.clearance import ClearanceStore, clearance_cookies, expires_at
+from utils.cache import MISSING, DegradedResult, anime_tag, cached, get_cache, get_validator_cache
+from core.errors import UpstreamError
+from utils.metrics import (
+    UPSTREAM_ERRORS, UPSTREAM_IN_FLIGHT, UPSTREAM_LATENCY, UPSTREAM_NOT_MODIFIED, registry, url_kind,
+)
+from utils.http_cache import conditional_headers, response_validators, validator_key
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Category listings sharing the anime__item pages of the search
+LISTINGS = {
+    'genre': GENRE_URL,
+    'type': TYPE_URL,
+    'letter': SEARCH_BY_CHARACTER_URL,
+}
+
+
+def listing_tag(kind: str, value: str) -> str:
+    """
+    Cache tag of every page of one category listing.
+    """
+    return f"listing:{kind}:{value}"
 
 class JKAnimeScraper:
     _instance = None
@@ -25,6 +60,39 @@ class JKAnimeScraper:
         if not self._initialized:
             session = kwargs.get("session", None)
             self._scraper = cloudscraper.create_scraper(session)
+            # Pooled aiohttp session, created lazily on the loop that uses it
+            self._session: Optional[aiohttp.ClientSession] = None
+            self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+            self._pool_size = kwargs.get("pool_size", config.HTTP_POOL_SIZE)
+            self._limit_per_host = kwargs.get("limit_per_host", config.HTTP_LIMIT_PER_HOST)
+            self._dns_cache_ttl = kwargs.get("dns_cache_ttl", config.HTTP_DNS_CACHE_TTL)
+            self._keepalive_timeout = kwargs.get("keepalive_timeout", config.HTTP_KEEPALIVE_TIMEOUT)
+            self._timeout = kwargs.get("timeout", config.HTTP_TIMEOUT)
+            # In-flight server resolutions and work detached from expired requests
+            self._resolving: Dict[Tuple[str, int], Tuple[List[Dict], List[asyncio.Task]]] = {}
+            self._background = set()
+            # Per-mirror latency/error stats and circuit breaker
+            self._health = MirrorHealth()
+            # Scrape cache shared with JKAnimeService, pluggable through the "cache" kwarg
+            self._cache = kwargs.get("cache") or get_cache()
+            # Upstream validators and the parse results they cover, kept apart from the scrape cache
+            self._validators = kwargs.get("validator_cache") or get_validator_cache()
+            # Upstream politeness: max in-flight episode lookups and requests/sec per host
+            self._max_in_flight = kwargs.get("max_in_flight", config.UPSTREAM_MAX_IN_FLIGHT)
+            self._rate_limiter = HostRateLimiter(
+                kwargs.get("rate_limit", config.UPSTREAM_RATE_LIMIT),
+                kwargs.get("burst", config.UPSTREAM_BURST),
+            )
+            # Player pages are many small fetches per episode, limited apart from the pages
+            self._player_rate_limiter = HostRateLimiter(
+                kwargs.get("player_rate_limit", config.UPSTREAM_PLAYER_RATE_LIMIT),
+                kwargs.get("player_burst", config.UPSTREAM_PLAYER_BURST),
+            )
+            # Bounded pool for the blocking cloudscraper fallback
+            self._executor = ThreadPoolExecutor(
+                max_workers=kwargs.get("fetch_threads", config.FETCH_THREADS),
+                thread_name_prefix="jkanime-fetch",
+            )
             self._headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
                 'Referer': BASE_URL,
@@ -33,10 +101,298 @@ class JKAnimeScraper:
                 'Connection': 'keep-alive',
                 'Upgrade-Insecure-Requests': '1',
             }
+            # Cloudflare clearance shared with the other workers of the node
+            self._clearance = ClearanceStore(kwargs.get("clearance_path", config.CLEARANCE_PATH))
+            self._clearance_saved_at = 0.0
+            self._clearance_future: Optional[Future] = None
+            # Where the clearance in use came from: 'store', 'solved' or None
+            self.clearance_source: Optional[str] = None
+            self._load_clearance()
             self._initialized = True
 
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Return the shared client session, creating it on the running loop.
+        A session is bound to the loop it was created on, so a new one is
+        opened if the caller runs on a different loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed and self._session_loop is loop:
+            return self._session
+
+        if self._session is not None and not self._session.closed:
+            await self._close_session()
+
+        connector = aiohttp.TCPConnector(
+            limit=self._pool_size,
+            limit_per_host=self._limit_per_host,
+            ttl_dns_cache=self._dns_cache_ttl,
+            keepalive_timeout=self._keepalive_timeout,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self._headers,
+            timeout=aiohttp.ClientTimeout(total=self._timeout),
+        )
+        self._session_loop = loop
+        return self._session
+
+    @staticmethod
+    def _is_challenge(status: int, headers, html: str) -> bool:
+        """
+        Check if a response is a Cloudflare challenge instead of the page.
+        """
+        if status not in (403, 429, 503):
+            return False
+        server = headers.get('Server', '').lower()
+        return 'cloudflare' in server or 'cf-chl' in html or 'Just a moment' in html
+
+    def _limiter(self, url: str) -> HostRateLimiter:
+        if url_kind(url, BASE_URL) == 'player':
+            return self._player_rate_limiter
+        return self._rate_limiter
+
+    async def _fetch_text(self, url: str) -> str:
+        _, _, html = await self._fetch(url)
+        return html
+
+    async def _fetch(self, url: str, extra_headers: Optional[Dict[str, str]] = None) -> Tuple[int, Mapping, str]:
+        """
+        Fetch a page without blocking the event loop, returns the status,
+        the response headers and the body.
+        The pooled aiohttp session is tried first with the cloudscraper cookies
+        and user agent. When Cloudflare answers with a challenge the request is
+        replayed through cloudscraper on the bounded thread pool, which also
+        refreshes the clearance cookies for the next native request.
+        """
+        await self._limiter(url).acquire(url)
+        with self._observe_fetch(url):
+            session = await self._get_session()
+            cookies = {cookie.name: cookie.value for cookie in self._scraper.cookies}
+            headers = {'User-Agent': self._scraper.headers.get('User-Agent', self._headers['User-Agent'])}
+            headers.update(extra_headers or {})
+            async with session.get(url, headers=headers, cookies=cookies) as response:
+                html = await response.text()
+                if not self._is_challenge(response.status, response.headers, html):
+                    self._check_status(url, response.status)
+                    return response.status, response.headers, html
+
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(self._executor, self._solve, url, extra_headers)
+            self._check_status(url, response.status_code)
+            return response.status_code, response.headers, response.text
+
+    def _get_text(self, url: str) -> str:
+        _, _, html = self._get(url)
+        return html
+
+    def _get(self, url: str, extra_headers: Optional[Dict[str, str]] = None) -> Tuple[int, Mapping, str]:
+        """
+        Fetch a page through cloudscraper for the synchronous scraper paths.
+        """
+        self._limiter(url).acquire_sync(url)
+        with self._observe_fetch(url):
+            response = self._get_tracking_clearance(url, extra_headers)
+            self._check_status(url, response.status_code)
+            return response.status_code, response.headers, response.text
+
+    async def _fetch_parsed(self, url: str, parse: Callable[[str], T], tag: Optional[str] = None) -> T:
+        """
+        Fetch and parse a page, revalidating with the validators of the last
+        response. On a 304 the stored parse result is returned as is.
+        """
+        key = validator_key(url)
+        stored = self._validators.get(key)
+        status, headers, html = await self._fetch(url, conditional_headers(stored))
+        return self._parsed(url, key, stored, status, headers, html, parse, tag)
+
+    def _get_parsed(self, url: str, parse: Callable[[str], T], tag: Optional[str] = None) -> T:
+        """
+        Synchronous ``_fetch_parsed``.
+        """
+        key = validator_key(url)
+        stored = self._validators.get(key)
+        status, headers, html = self._get(url, conditional_headers(stored))
+        return self._parsed(url, key, stored, status, headers, html, parse, tag)
+
+    def _parsed(self, url, key, stored, status, headers, html, parse, tag):
+        if status == 304 and isinstance(stored, dict):
+            UPSTREAM_NOT_MODIFIED.inc(kind=url_kind(url, BASE_URL))
+            return stored['parsed']
+        parsed = parse(html)
+        validators = response_validators(headers)
+        if validators and status == 200:
+            self._validators.set(key, dict(validators, parsed=parsed), config.CACHE_VALIDATOR_TTL, tag)
+        return parsed
+
+    # Cloudflare clearance
+
+    def _clearance_snapshot(self) -> List[Tuple[str, str]]:
+        return sorted((c['name'], c['value']) for c in clearance_cookies(self._scraper.cookies))
+
+    def _load_clearance(self) -> bool:
+        """
+        Apply the shared clearance when it is newer than ours.
+        """
+        data = self._clearance.load()
+        if data is None or data['saved_at'] <= self._clearance_saved_at:
+            return False
+        for cookie in data['cookies']:
+            self._scraper.cookies.set(
+                cookie['name'], cookie['value'],
+                domain=cookie['domain'], path=cookie['path'], expires=cookie['expires'],
+            )
+        if data.get('user_agent'):
+            self._scraper.headers['User-Agent'] = data['user_agent']
+        self._clearance_saved_at = data['saved_at']
+        self.clearance_source = 'store'
+        logger.info("Loaded Cloudflare clearance saved %.0fs ago", time.time() - data['saved_at'])
+        return True
+
+    def _save_clearance(self) -> None:
+        cookies = clearance_cookies(self._scraper.cookies)
+        if cookies:
+            self._clearance_saved_at = self._clearance.save(self._scraper.headers.get('User-Agent'), cookies)
+            self.clearance_source = 'solved'
+
+    def _has_clearance(self) -> bool:
+        expires = expires_at(clearance_cookies(self._scraper.cookies))
+        return expires is not None and expires > time.time()
+
+    def _solve(self, url: str, extra_headers: Optional[Dict[str, str]] = None):
+        """
+        Fetch through cloudscraper, solving the challenge if there is one.
+        With a valid clearance the fetch runs without the store lock, which
+        is only taken to share a clearance that changed. Without one a
+        challenge is expected, so the fetch runs under the lock: when another
+        worker solved it meanwhile its clearance is used instead.
+        """
+        self._load_clearance()
+        if self._has_clearance():
+            return self._get_tracking_clearance(url, extra_headers)
+        with self._clearance.solving():
+            self._load_clearance()
+            return self._get_tracking_clearance(url, extra_headers)
+
+    def _get_tracking_clearance(self, url: str, extra_headers: Optional[Dict[str, str]] = None):
+        before = self._clearance_snapshot()
+        response = self._scraper.get(url, headers=extra_headers)
+        if self._clearance_snapshot() != before:
+            logger.info("Solved Cloudflare challenge for %s", url)
+            self._save_clearance()
+        return response
+
+    def _renew_clearance(self) -> None:
+        """
+        Get a fresh clearance before the current one expires, unless
+        another worker already did.
+        """
+        with self._clearance.solving():
+            self._load_clearance()
+            expires = expires_at(clearance_cookies(self._scraper.cookies))
+            if expires is None or expires - time.time() > config.CLEARANCE_REFRESH_MARGIN:
+                return
+            # Drop the expiring cookie so Cloudflare issues a new one
+            for cookie in list(self._scraper.cookies):
+                if cookie.name == 'cf_clearance':
+                    self._scraper.cookies.clear(cookie.domain, cookie.path, cookie.name)
+            self._scraper.get(BASE_URL)
+            self._save_clearance()
+            logger.info("Renewed Cloudflare clearance")
+
+    async def keep_clearance(self) -> None:
+        """
+        Renew the clearance shortly before it expires, for as long as the
+        scraper lives. Sites that do not challenge are only checked every
+        ``CLEARANCE_CHECK_INTERVAL`` seconds.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            expires = expires_at(clearance_cookies(self._scraper.cookies))
+            if expires is None:
+                delay = config.CLEARANCE_CHECK_INTERVAL
+            else:
+                # Retry at most every 30s when a renewal fails
+                delay = max(30.0, expires - config.CLEARANCE_REFRESH_MARGIN - time.time())
+            await asyncio.sleep(delay)
+            try:
+                if not self._load_clearance():
+                    await loop.run_in_executor(self._executor, self._renew_clearance)
+            except Exception as e:
+                logger.warning("Error renewing Cloudflare clearance: %s", e)
+
+    def start_clearance_refresher(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._clearance_future is None:
+            self._clearance_future = asyncio.run_coroutine_threadsafe(self.keep_clearance(), loop)
+
+    @staticmethod
+    @contextmanager
+    def _observe_fetch(url: str):
+        """
+        Record latency, errors and in-flight count of an upstream fetch,
+        excluding the time spent waiting for the rate limiter.
+        """
+        if not registry.enabled:
+            yield
+            return
+        kind = url_kind(url, BASE_URL)
+        start = time.perf_counter()
+        UPSTREAM_IN_FLIGHT.inc()
+        try:
+            yield
+        except Exception:
+            UPSTREAM_ERRORS.inc(kind=kind)
+            raise
+        finally:
+            UPSTREAM_IN_FLIGHT.dec()
+            UPSTREAM_LATENCY.observe(time.perf_counter() - start, kind=kind)
+
+    @staticmethod
+    def _check_status(url: str, status: int) -> None:
+        # A 404 is a real "not found" page, server errors must not be cached as results
+        if status >= 500 or status == 429:
+            raise UpstreamError(f"jkanime returned {status} for {url}")
+
+    def _detach_session(self):
+        session, loop = self._session, self._session_loop
+        self._session = None
+        self._session_loop = None
+        if session is None or session.closed:
+            return None, None
+        return session, loop
+
+    async def _close_session(self) -> None:
+        session, loop = self._detach_session()
+        if session is None:
+            return
+        if loop is asyncio.get_running_loop():
+            await session.close()
+        elif loop is not None and loop.is_running():
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), loop))
+        else:
+            # The owning loop can no longer run, drop the session without awaiting it
+            session.detach()
+
     def close(self) -> None:
+        if self._clearance_future is not None:
+            self._clearance_future.cancel()
+            self._clearance_future = None
         self._scraper.close()
+        self._executor.shutdown(wait=False)
+
+        session, loop = self._detach_session()
+        if session is None:
+            return
+        if loop is not None and loop.is_running():
+            # Work detached from expired requests must not outlive the session
+            for task in list(self._background):
+                loop.call_soon_threadsafe(task.cancel)
+        if loop is None or loop.is_closed():
+            session.detach()
+        elif loop.is_running():
+            asyncio.run_coroutine_threadsafe(session.close(), loop).result(timeout=self._timeout)
+        else:
+            loop.run_until_complete(session.close())
     
     def __enter__(self) -> "JKAnimeScraper":
         return self
@@ -49,7 +405,7 @@ class JKAnimeScraper:
     ) -> None:
         self.close()
     
-    @alru_cache(maxsize=100)
+    @cached('servers', tag=lambda id, episode, **kwargs: anime_tag(id), fallback=list)
     async def get_video_servers(
             self,
             id: str,
@@ -65,96 +421,180 @@ class JKAnimeScraper:
         :rtype: list
         """
 
+        logger.debug("Fetching data for %s episode %s", id, episode)
+
+        found = await self._fetch_parsed(f"{BASE_URL}{id}/{episode}", extract_servers, anime_tag(id))
+
+        # The servers array of the "var video" script
+        servers = []
+        for server in found:
+            iframe_url = f"/c1?u={server['remote']}&s={server['server'].lower()}"
+            servers.append({'iframe': iframe_url, 'name': server['server'], 'mirror': server['server'].lower()})
+
+        # Skip mirrors whose circuit is open
+        active = [server for server in servers if self._health.allow(server['mirror'])]
+
+        # Process servers concurrently
+        tasks = []
+        for server in active:
+            task = asyncio.create_task(self._get_video_url_async(server['iframe'], id, strict=True))
+            tasks.append(task)
+
+        # Let deadline-bounded callers see what has resolved so far
+        self._resolving[(id, episode)] = (active, tasks)
         try:
-             # Add cache hit/miss debug
-            cache_info = self.get_video_servers.cache_info()
-            print(f"DEBUG: Cache stats - Hits: {cache_info.hits}, Misses: {cache_info.misses}, Size: {cache_info.currsize}")
-            
-            print(f"DEBUG: Fetching data for {id} episode {episode}")
-                
-            response = self._scraper.get(f"{BASE_URL}{id}/{episode}")
-            soup = BeautifulSoup(response.text, "lxml")
-
-            # Find the specific script containing video information
-            target_script = soup.find("script", string=lambda s: s and "var video = [];" in s)
-            if not target_script:
-                return []
-            
-            content = target_script.string or target_script.text
-            servers = []
-
-            # Extract servers array in one pass
-            servers_match = re.search(r"var servers = (\[.*?\]);", content, re.DOTALL)
-            if servers_match:
-                try:
-                    servers_data = json.loads(servers_match.group(1))
-                    for server in servers_data:
-                        iframe_url = f"/c1?u={server['remote']}&s={server['server'].lower()}"
-                        servers.append({'iframe': iframe_url})
-                except json.JSONDecodeError:
-                    pass
-
-            # Process servers concurrently
-            tasks = []
-            for server in servers:
-                task = asyncio.create_task(self._get_video_url_async(server['iframe']))
-                tasks.append(task)
-            
-            results = await asyncio.gather(*tasks)
-            return results
-        
-        except Exception as e:
-            print(f"Error getting video servers: {str(e)}")
-            return []
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            self._resolving.pop((id, episode), None)
+        # Mirrors skipped or failing behind an open circuit are known dead, leaving
+        # them out is the complete answer; only failures of healthy ones are retried
+        failed = any(
+            isinstance(result, Exception) and not self._health.is_open(server['mirror'])
+            for server, result in zip(active, results)
+        )
+        results = self._health.order(
+            (server['mirror'], None if isinstance(result, Exception) else result)
+            for server, result in zip(active, results)
+        )
+        if failed:
+            # Keep what resolved but only cache it briefly
+            raise DegradedResult(results)
+        return results
 
 
-    @alru_cache(maxsize=100)
-    async def _get_video_url_async(self, iframe_url: str) -> Optional[Dict[str, str]]:
+    async def resolve_video_servers(
+            self,
+            id: str,
+            episode: int,
+            budget: Optional[float] = None,
+    ) -> Dict:
+        """
+        Get video servers within a latency budget in seconds.
+        Servers resolved when the budget runs out are returned and the rest
+        are listed as pending; their resolution keeps running in the
+        background so the cache is complete for the next caller.
+        ``budget=None`` waits for every server. ``degraded`` tells a complete
+        answer where some mirrors failed, which is only cached briefly, and
+        ``pending_page`` that the episode page itself had not arrived yet, so
+        the servers are not even known.
+        """
+        task = asyncio.ensure_future(self.get_video_servers(id, episode, strict=True))
+        done, _ = await asyncio.wait({task}, timeout=budget)
+        if task in done:
+            degraded = False
+            try:
+                servers = task.result()
+            except DegradedResult as result:
+                servers = result.value
+                degraded = True
+            return {
+                'servers': [server for server in servers if server],
+                'pending': [],
+                'partial': False,
+                'degraded': degraded,
+                'pending_page': False,
+            }
+
+        # Out of time: keep the work alive and report the progress so far
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        resolved, pending = [], []
+        resolving = self._resolving.get((id, episode))
+        listed, tasks = resolving or ([], [])
+        for server, server_task in zip(listed, tasks):
+            if not server_task.done():
+                pending.append({'server': server['name'], 'iframe': server['iframe']})
+            elif not server_task.cancelled() and server_task.exception() is None:
+                resolved.append((server['mirror'], server_task.result()))
+        return {
+            'servers': self._health.order(resolved),
+            'pending': pending,
+            'partial': True,
+            'degraded': False,
+            'pending_page': resolving is None,
+        }
+
+    @cached(
+        'iframe',
+        key=lambda iframe_url, anime_id=None: (iframe_url,),
+        tag=lambda iframe_url, anime_id=None: anime_tag(anime_id) if anime_id else None,
+        fallback=lambda: None,
+    )
+    async def _get_video_url_async(
+            self,
+            iframe_url: str,
+            anime_id: Optional[str] = None,
+    ) -> Optional[Dict[str, str]]:
         """
         Get video URL from an iframe URL.
         Returns a dictionary containing server name and video URL.
         """
+        logger.debug("Fetching data for %s", iframe_url)
+
+        mirror = parse_qs(urlsplit(iframe_url).query).get('s', [iframe_url])[0]
+        if iframe_url.startswith('/'):
+            iframe_url = BASE_URL.rstrip('/') + "/jkplayer" + iframe_url
+
+        started = time.perf_counter()
         try:
-            print(f"DEBUG: Fetching data for {iframe_url}")
-
-            
-            if iframe_url.startswith('/'):
-                iframe_url = BASE_URL.rstrip('/') + "/jkplayer" + iframe_url
-            
-            # Create a new session for each request
-            async with aiohttp.ClientSession() as session:
-                async with session.get(iframe_url, headers=self._headers) as response:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, "lxml")
-
-                    # Extract server name
-                    server_name = None
-                    script_tag = soup.find('script')
-                    if script_tag:
-                        script_content = script_tag.string or script_tag.text
-                        match = re.search(r"var servername = \"([^\"]+)\";", script_content)
-                        if match:
-                            server_name = match.group(1)
-
-                    # Try to get video URL from iframe first
-                    iframe = soup.find('iframe')
-                    if iframe and iframe.has_attr('src'):
-                        video_url = iframe['src'].strip()
-                        if video_url.startswith('http'):
-                            return {'server': server_name, 'url': video_url}
-                        
-                    return None
-
-        except Exception as e:
-            print(f"Error getting video URL: {str(e)}")
-            return None
+            html = await self._fetch_hedged(iframe_url, mirror)
+        except Exception:
+            self._health.record(mirror, time.perf_counter() - started, ok=False)
+            raise
+        server_name, video_url = extract_player(html)
+
+        # Try to get video URL from iframe first
+        if video_url and video_url.startswith('http'):
+            self._health.record(mirror, time.perf_counter() - started, ok=True, alias=server_name)
+            return {'server': server_name, 'url': video_url}
+
+        # A player page without a video counts against the mirror
+        self._health.record(mirror, time.perf_counter() - started, ok=False, alias=server_name)
+        return None
+
+    async def _fetch_hedged(self, url: str, mirror: str) -> str:
+        """
+        Fetch a player page, sending one duplicate request when the first is
+        slower than the mirror's usual tail latency. The first successful
+        response wins and the other request is cancelled.
+        """
+        first = asyncio.ensure_future(self._fetch_text(url))
+        done, _ = await asyncio.wait({first}, timeout=self._health.hedge_delay(mirror))
+        if done:
+            return first.result()
+
+        pending = {first, asyncio.ensure_future(self._fetch_text(url))}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
     
     def clear_cache(self):
         """Clear cache"""
-        self.get_video_servers.cache_clear()
-        self._get_video_url_async.cache_clear()
+        self._cache.clear()
+        self._validators.clear()
+
+    def invalidate_anime(self, anime_id: Union[str, int]) -> int:
+        """
+        Drop every cached entry of an anime, returns the number removed.
+        """
+        return self._cache.invalidate_tag(anime_tag(anime_id)) + self._validators.invalidate_tag(anime_tag(anime_id))
 
 
+    @cached(
+        'search',
+        encode=lambda results: [anime.data for anime in results],
+        decode=lambda data: [Anime(**item) for item in data],
+    )
     def search_anime(self, query: str = None, page: int = None) -> List[Anime]:
         """
         Search in jkanime.net by query.
@@ -165,155 +605,251 @@ class JKAnimeScraper:
         if page is not None and not isinstance(page, int):
             raise TypeError
         
-        response = self._scraper.get(f"{SEARCH_URL}{query}/{page}")
-        soup = BeautifulSoup(response.text, "lxml")
-
-        anime_items = []
-        anime_items = soup.find_all('div', class_='anime__item')
-        results = []
-
-        for item in anime_items:
-            # Extract info from anime
-            # Id
-            title_id = item.find('h5')
-            if title_id:
-                a_tag = title_id.find('a')
-                if a_tag:
-                    href = a_tag.get('href')
-                    id = href.strip('/').split('/')[-1]
-            # Title
-            title_elem = item.find('div', class_='title')
-            if title_elem:
-                title_text = title_elem.text.strip()
-            # Image
-            img_elem = item.find('div', class_="anime__item__pic")
-            if img_elem:
-                img_url = img_elem.get('data-setbg')
-
-            # Synopsis
-            p_elem = item.find('p')
-            if p_elem:
-                synopsis = p_elem.text.strip()
-            
-            # Type (Anime, Movie, OVA)
-            li_elem = item.find('li', class_="anime")
-            if li_elem:
-                type = li_elem.text.strip()
-            
-            # Create anime object with all the obtained parameters
-            anime = Anime(id, title_text, img_url, synopsis, type)
-            results.append(anime)
-        return results
+        return self._anime_items(f"{SEARCH_URL}{query}/{page}")
+
+    def _anime_items(self, url: str) -> List[Anime]:
+        """
+        Anime objects from every anime__item card of a search or listing page.
+        """
+        return [Anime(**item) for item in self._get_parsed(url, extract_anime_items)]
+
+    @cached(
+        'listing',
+        tag=lambda kind, value, page: listing_tag(kind, value),
+        encode=lambda results: [anime.data for anime in results],
+        decode=lambda data: [Anime(**item) for item in data],
+    )
+    def get_listing(self, kind: str, value: str, page: int) -> List[Anime]:
+        """
+        A page of a category listing: ``kind`` is one of LISTINGS ("genre",
+        "type", "letter") and ``value`` its slug, e.g. ("genre", "accion").
+        """
+        if kind not in LISTINGS:
+            raise ValueError(f"Unknown listing {kind!r}")
+        logger.debug("Fetching %s listing %s page %s", kind, value, page)
+        return self._anime_items(f"{LISTINGS[kind]}{value}/{page}/")
+
+    def prefetch_listing(self, kind: str, value: str, page: int) -> None:
+        """
+        Warm the cache with a listing page in the background, unless it is
+        already cached.
+        """
+        if self._cache.get(JKAnimeScraper.get_listing.cache_key(kind, value, page)) is not MISSING:
+            return
+        try:
+            self._executor.submit(self.get_listing, kind, value, page)
+        except RuntimeError:
+            # The executor is shut down, the scraper is closing
+            pass
     
-    @alru_cache(maxsize=100)
-    async def get_episodes_by_anime_id(self, anime_id: Union[str, int], page: int) -> Dict:
+    @cached(
+        'anime',
+        tag=lambda anime_id: anime_tag(anime_id),
+        fallback=lambda: None,
+    )
+    async def get_anime_info(self, anime_id: Union[str, int]) -> Dict:
+        """
+        Metadata of an anime page: title fields, episode ranges per page and
+        the episode count. Cached separately from the episode servers so
+        paging through a series reads the anime page once.
+        """
+        logger.debug("Fetching anime page for %s", anime_id)
+
+        page_data = await self._fetch_parsed(
+            f"{BASE_URL}{anime_id}",
+            lambda html: {'details': extract_details(html), 'pagination': extract_pagination(html)},
+            anime_tag(anime_id),
+        )
+        info = {'id': anime_id, **(page_data['details'] or {})}
+
+        ranges = []
+        for href, text in page_data['pagination'] or []:
+            try:
+                page = int(href.replace('#pag', ''))
+                start, end = map(int, text.split('-'))
+            except (AttributeError, ValueError):
+                logger.debug("Invalid episode range format: %s", text)
+                continue
+            ranges.append({'page': page, 'start': start, 'end': end})
+        if not ranges:
+            logger.debug("No pagination found for %s", anime_id)
+
+        info['episode_ranges'] = ranges
+        info['total_pages'] = len(ranges)
+        info['total_episodes'] = max((r['end'] for r in ranges), default=0)
+        info['fetched_at'] = time.time()
+        return info
+
+    async def revalidate_anime_info(self, anime_id: Union[str, int], info: Optional[Dict] = None) -> Dict:
+        """
+        Fetch the anime page again when the cached record may be behind,
+        e.g. a page past the known ranges was asked for on an airing series.
+        Records younger than the negative TTL are kept, so a bad page number
+        cannot turn every request into an upstream hit.
+        """
+        info = info or await self.get_anime_info(anime_id, strict=True)
+        if time.time() - info.get('fetched_at', 0) < config.CACHE_NEGATIVE_TTL:
+            return info
+        self._cache.delete(JKAnimeScraper.get_anime_info.cache_key(anime_id))
+        return await self.get_anime_info(anime_id, strict=True)
+
+    async def _episode_ranges(
+            self,
+            anime_id: Union[str, int],
+            page: Optional[int] = None,
+    ) -> List[Tuple[int, int, int]]:
+        """
+        ``(page, first episode, last episode)`` for every episode page of an
+        anime, from the cached anime metadata. Revalidates the record once
+        when ``page`` is not in it.
+        """
+        info = await self.get_anime_info(anime_id, strict=True)
+        if page is not None and all(r['page'] != page for r in info['episode_ranges']):
+            info = await self.revalidate_anime_info(anime_id, info)
+        return [(r['page'], r['start'], r['end']) for r in info['episode_ranges']]
+
+    async def iter_episodes(
+            self,
+            anime_id: Union[str, int],
+            page: Optional[int] = None,
+            max_episodes: Optional[int] = None,
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream the server lists of an anime's episodes as they resolve.
+        Yields a "pagination" event first, then one "episode" event per
+        episode in completion order, then a "summary" event. ``page=None``
+        streams the whole series, up to its first ``max_episodes`` episodes.
+        At most ``max_in_flight`` episodes are pending at any time, so memory
+        does not grow with the series length.
+        """
+        started = time.perf_counter()
+        ranges = await self._episode_ranges(anime_id, page)
+        selected = ranges if page is None else [r for r in ranges if r[0] == page]
+        total = sum(end - start + 1 for _, start, end in selected)
+        yield {
+            'event': 'pagination',
+            'anime_id': anime_id,
+            'current_page': page,
+            'total_pages': len(ranges),
+            'total_episodes': total,
+            'episode_ranges': [f"{start}-{end}" for _, start, end in selected],
+            'truncated': max_episodes is not None and total > max_episodes,
+        }
+
+        numbers = (number for _, start, end in selected for number in range(start, end + 1))
+        if max_episodes is not None:
+            numbers = itertools.islice(numbers, max_episodes)
+        pending: Dict[asyncio.Task, int] = {}
+        resolved = failed = 0
         try:
-            response = self._scraper.get(f"{BASE_URL}{anime_id}")
-            soup = BeautifulSoup(response.text, "lxml")
-            anime_pagination = soup.find("div", class_='anime__pagination')
-            if not anime_pagination:
-                print(f"DEBUG: No pagination found for {anime_id}")
-                return {'episodes': [], 'pagination': {}}
-            # Find the a tag with the pagination number of page input
-            pages = anime_pagination.find_all("a", class_="numbers")
-            if not pages:
-                print(f"DEBUG: No page numbers found for {anime_id}")
-                return {'episodes': [], 'pagination': {}}
-
-            # Find the requested page
-            target_page = None
-            for item in pages:
-                if item.get('href') == f"#pag{page}":
-                    target_page = item
+            while True:
+                # Top up the window of in-flight episodes
+                while len(pending) < self._max_in_flight:
+                    number = next(numbers, None)
+                    if number is None:
+                        break
+                    task = asyncio.ensure_future(self.get_video_servers(anime_id, number, strict=True))
+                    pending[task] = number
+                if not pending:
                     break
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    number = pending.pop(task)
+                    event = {'event': 'episode', 'number': number, 'servers': [], 'partial': False}
+                    try:
+                        event['servers'] = task.result()
+                    except DegradedResult as degraded:
+                        event['servers'] = degraded.value
+                        event['partial'] = True
+                    except Exception as e:
+                        event['error'] = str(e)
+                        failed += 1
+                        yield event
+                        continue
+                    resolved += 1
+                    yield event
+        finally:
+            # The client went away: cancel what is still pending. Shared
+            # fetches stop once no other caller waits for them either.
+            for task in pending:
+                task.cancel()
 
-            if not target_page:
-                print(f"DEBUG: Page {page} not found for {anime_id}")
-                return {'episodes': [], 'pagination': {}}
+        yield {
+            'event': 'summary',
+            'resolved': resolved,
+            'failed': failed,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    @cached(
+        'episodes',
+        tag=lambda anime_id, page: anime_tag(anime_id),
+        fallback=lambda: {'episodes': [], 'pagination': {}},
+    )
+    async def get_episodes_by_anime_id(self, anime_id: Union[str, int], page: int) -> Dict:
+        ranges = await self._episode_ranges(anime_id, page)
+        if not ranges:
+            return {'episodes': [], 'pagination': {}}
 
-            # Get episode range
-            episode_range = target_page.text.strip()
-            if not episode_range:
-                print(f"DEBUG: No episode range found for page {page}")
-                return {'episodes': [], 'pagination': {}}
+        # Find the requested page
+        target = next((r for r in ranges if r[0] == page), None)
+        if target is None:
+            logger.debug("Page %s not found for %s", page, anime_id)
+            return {'episodes': [], 'pagination': {}}
+        _, start, end = target
+        episode_numbers = list(range(start, end+1))
 
-            try:
-                start, end = map(int, episode_range.split('-'))
-                episode_numbers = list(range(start, end+1))
-                print(f"DEBUG: Episodes for page {page}: {episode_numbers}")
-            except ValueError as e:
-                print(f"DEBUG: Invalid episode range format: {episode_range}")
-                return {'episodes': [], 'pagination': {}}
-
-             # Process episodes sequentially with a small delay
-            episodes = []
-            for number in episode_numbers:
-                try:
-                    # Add a small delay between requests (0.5 seconds)
-                    await asyncio.sleep(0.5)
-                    episode_data = await self.get_video_servers(anime_id, number)
-                    if episode_data:  # Only add if we got data
-                        episodes.append(episode_data)
-                    print(f"DEBUG: Got data for episode {number}")
-                except Exception as e:
-                    print(f"DEBUG: Error getting episode {number}: {str(e)}")
-                    continue
+        # Resolve episodes concurrently, bounded by max in-flight and the
+        # per-host rate limiter, keeping the page order
+        results = await bounded_gather(
+            (lambda number=number: self.get_video_servers(anime_id, number, strict=True) for number in episode_numbers),
+            self._max_in_flight,
+            return_exceptions=True,
+        )
+        episodes = []
+        failed = False
+        for number, episode_data in zip(episode_numbers, results):
+            if isinstance(episode_data, DegradedResult):
+                # Some servers of this episode failed, keep the rest
+                episode_data = episode_data.value
+                failed = True
+            elif isinstance(episode_data, Exception):
+                logger.warning("Error getting episode %s: %s", number, episode_data)
+                failed = True
+                continue
+            if episode_data:  # Only add if we got data
+                episodes.append(episode_data)
 
-            return {
-                'episodes': episodes,
-                'pagination': {
-                    'current_page': page,
-                    'total_episodes': len(episode_numbers),
-                    'episode_range': f"{start}-{end}"
-                }
+        result = {
+            'episodes': episodes,
+            'pagination': {
+                'current_page': page,
+                'total_episodes': len(episode_numbers),
+                'episode_range': f"{start}-{end}"
             }
+        }
+        if failed:
+            raise DegradedResult(result)
+        return result
 
-        except Exception as e:
-            print(f"Error in get_episodes_by_anime_id: {str(e)}")
-            print(f"DEBUG: Full error details: {e.__class__.__name__}: {str(e)}")
-            return {'episodes': [], 'pagination': {}}
-        
+    @cached('schedule', fallback=list)
+    async def get_schedule(self) -> List[Dict]:
+        """
+        Airing titles from the weekly schedule with their newest episode
+        """
+        logger.debug("Fetching schedule")
+
+        return await self._fetch_parsed(SCHEDULE_URL, extract_schedule)
+
+    @cached('directory', fallback=list)
     def get_all(self, page):
         """
         Get titles by query page
         :param page: pagination number
         """
-        try:
-            print(f"DEBUG: Fetching data for page number {page} in directory")
-
-            response = self._scraper.get(f"{DIRECTORY_URL}/{page}")
-            soup = BeautifulSoup(response.text, "lxml")
-
-            # Extract animes variable content
-            titles = None
-            target_script = soup.find("script", string=lambda s: s and "var animes =" in s)
-            print(target_script)
-            if not target_script:
-                return []
-            
-            # Extract the animes array from the script contents
-            script_content = target_script.string
-            start_marker = "var animes ="
-            start_idx = script_content.find(start_marker)
-            start_idx += len(start_marker)
-            print(start_idx)
-            end_idx = script_content.find("var mode =")
-            print(end_idx)
-            if end_idx == -1:
-                end_idx = script_content.find("function anime_status")
-
-            animes_json = script_content[start_idx:end_idx].strip()
-            print(animes_json)
-            if animes_json.endswith(";"):
-                animes_json = animes_json[:-1]
-            
-            # Parse the JSON data
-            titles = json.loads(animes_json)
-            print(f"DEBUG: Found {len(titles)} titles")
-            print(titles)
-            return titles
-        
+        logger.debug("Fetching data for page number %s in directory", page)
 
-        except Exception as e:
-            print(f"Error getting titles: {str(e)}")
-            return []
\ No newline at end of file
+        # The animes array of the "var animes" script
+        titles = self._get_parsed(f"{DIRECTORY_URL}/{page}", extract_animes)
+        logger.debug("Found %d titles", len(titles))
+        return titles
@@ -0,0 +1,102 @@
+"""
+JSON encoding of API responses.
+
+Responses may contain the slotted model records (``Anime``, ``Episode``)
+as they are. ``orjson`` writes them directly without intermediate dicts and
+is used when installed; the stdlib encoder is the fallback and converts
+them first. Pick one explicitly with ``JKANIME_JSON_BACKEND=orjson|json``
+or ``set_backend``.
+"""
+
+import dataclasses
+import json
+from typing import Any, Callable, Dict, Optional
+from flask import current_app, has_app_context, make_response
+from core import config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Per model class, the function building its dict
+_CONVERTERS: Dict[type, Callable[[Any], Dict]] = {}
+
+
+def _converter(cls: type) -> Callable[[Any], Dict]:
+    converter = _CONVERTERS.get(cls)
+    if converter is None:
+        if isinstance(getattr(cls, 'data', None), property):
+            # The model's own dict literal
+            converter = cls.data.fget
+        else:
+            names = [field.name for field in dataclasses.fields(cls)]
+
+            def converter(obj: Any) -> Dict:
+                return {name: getattr(obj, name) for name in names}
+        _CONVERTERS[cls] = converter
+    return converter
+
+
+def _plain(obj: Any) -> Any:
+    """
+    Replace model records by dicts for the stdlib encoder, which would
+    otherwise call ``default`` once per record on its slow path.
+    """
+    kind = type(obj)
+    if kind is dict:
+        return {key: _plain(value) for key, value in obj.items()}
+    if kind is list or kind is tuple:
+        if obj and dataclasses.is_dataclass(obj[0]) and all(type(item) is type(obj[0]) for item in obj):
+            convert = _converter(type(obj[0]))
+            return [convert(item) for item in obj]
+        return [_plain(item) for item in obj]
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return _plain(_converter(kind)(obj))
+    return obj
+
+
+def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+    settings = current_app.config.get('RESTFUL_JSON', {}) if has_app_context() else {}
+    if indent:
+        settings = dict(settings, indent=4)
+    return json.dumps(_plain(obj), **settings).encode('utf-8')
+
+
+def _orjson_dumps(obj: Any, indent: bool = False) -> bytes:
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+    return orjson.dumps(obj, option=option)
+
+
+BACKENDS: Dict[str, Callable[..., bytes]] = {'json': _json_dumps}
+if orjson is not None:
+    BACKENDS['orjson'] = _orjson_dumps
+
+_backend: Optional[Callable[..., bytes]] = None
+
+
+def set_backend(name: str) -> None:
+    """
+    Select the encoder: "orjson", "json" or "auto" (orjson when installed).
+    """
+    global _backend
+    if name == 'auto':
+        name = 'orjson' if 'orjson' in BACKENDS else 'json'
+    if name not in BACKENDS:
+        raise Exception(f"Unknown or unavailable JSON backend {name!r}")
+    _backend = BACKENDS[name]
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    if _backend is None:
+        set_backend(config.JSON_BACKEND)
+    return _backend(obj, indent)
+
+
+def output_json(data: Any, code: int, headers: Optional[Dict] = None):
+    """
+    Flask-RESTful representation for application/json using ``dumps``.
+    """
+    response = make_response(dumps(data, indent=current_app.debug) + b"\n", code)
+    response.headers.extend(headers or {})
+    return response
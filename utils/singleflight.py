@@ -0,0 +1,109 @@
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls into one execution.
+    The first caller for a key runs the work, callers arriving while it is
+    in flight wait for and share its result (or exception). Works for
+    blocking callables across threads and for coroutines on an event loop.
+    A coroutine flight is cancelled when its last waiter is, so work nobody
+    waits for any more does not keep hitting upstream.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, "_Call"] = {}
+        self._tasks: Dict[Tuple[int, Hashable], "asyncio.Future"] = {}
+        self._waiters: Dict[Tuple[int, Hashable], int] = {}
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {'calls': 0, 'executions': 0, 'coalesced': 0})
+
+    def _count(self, operation: str, leader: bool) -> None:
+        stats = self._stats[operation]
+        stats['calls'] += 1
+        stats['executions' if leader else 'coalesced'] += 1
+
+    def do(self, operation: str, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run ``fn`` once for every concurrent caller with the same key.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._count(operation, leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def do_async(self, operation: str, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await ``factory()`` once for every concurrent caller with the same key.
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            leader = task is None
+            if leader:
+                task = self._tasks[task_key] = loop.create_task(factory())
+                task.add_done_callback(lambda _: self._forget(task_key))
+            self._waiters[task_key] = self._waiters.get(task_key, 0) + 1
+            self._count(operation, leader)
+        try:
+            # Shield so a cancelled caller does not cancel the work the others wait for
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._leave(task_key, task):
+                task.cancel()
+            raise
+
+    def _leave(self, task_key: Tuple[int, Hashable], task: "asyncio.Future") -> bool:
+        """
+        Drop a cancelled waiter, True when it was the last one of a running flight.
+        """
+        with self._lock:
+            if self._tasks.get(task_key) is not task:
+                return False
+            self._waiters[task_key] -= 1
+            return self._waiters[task_key] == 0
+
+    def _forget(self, task_key: Tuple[int, Hashable]) -> None:
+        with self._lock:
+            self._tasks.pop(task_key, None)
+            self._waiters.pop(task_key, None)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {operation: dict(stats) for operation, stats in self._stats.items()}
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# Shared by every cached scraper method
+flights = SingleFlight()